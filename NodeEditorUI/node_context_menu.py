@@ -11,6 +11,8 @@ if script_path not in sys.path:
 # Reload py files used by modules
 import functionality
 importlib.reload(functionality)
+import storeObjectsInJSON
+import cmdsProfiler
 from node_item import *
 
 class NodeContextMenu(QtWidgets.QMenu):
@@ -191,6 +193,9 @@ class NodeContextMenu(QtWidgets.QMenu):
                     f"Connection Error: {connection.start_socket.name} to {connection.end_socket.name} - {str(e)}"
                 )
 
+        # Write the constraints created above to the registry file in one go
+        storeObjectsInJSON.flushGeneratedObjects()
+
 
     def import_template(self):
         """
@@ -224,9 +229,10 @@ class NodeContextMenu(QtWidgets.QMenu):
             template_kwargs = module_config.get('template_kwargs', {})
             template_kwargs['identifier'] = node_name
             
-            # Call template function
+            # Call template function, recorded as one undo chunk
             template_method = getattr(module, module_config['template_method'])
-            template_method(**template_kwargs)
+            with functionality.buildUndo(f"Import Template {node_name}"):
+                template_method(**template_kwargs)
             
 
         except Exception as e:
@@ -287,38 +293,42 @@ class NodeContextMenu(QtWidgets.QMenu):
                 rig_kwargs = module_config.get('rig_kwargs', {})
                 rig_kwargs['identifier'] = node_name
                 
-                # Call rig function and capture its return
+                # Call rig function, capture its return and connect it to the other modules as one undo chunk, a "connection_mode" entry
+                # overrides the global connection mode for the build and its connections.
+                # With cmdsProfiler.PROFILE_BUILDS on, the cmds calls of the build are reported per node type
                 rig_method = getattr(module, module_config['rig_method'])
-                connections = rig_method(**rig_kwargs)
+                with functionality.buildUndo(f"Re-Rig {node_name}"), functionality.connectionMode(module_config.get('connection_mode')):
+                    with cmdsProfiler.profileBuild(node_type):
+                        connections = rig_method(**rig_kwargs)
                 
-                # Update socket associated codes with actual Maya item names
-                for socket_name, socket in node_item.node_instance.input_sockets.items():
-                    if socket.associated_code:
-                        try:
-                            # Evaluate the associated code in the context of the returned connections
-                            actual_item_name = eval(socket.associated_code, {"__builtins__": None}, 
-                                                   {"connectionsIKarms": connections, "connectionsSpineIK": connections, "connectionsControl": connections, "connectionsFKChain": connections, "connectionsfoot": connections})
+                    # Update socket associated codes with actual Maya item names
+                    for socket_name, socket in node_item.node_instance.input_sockets.items():
+                        if socket.associated_code:
+                            try:
+                                # Evaluate the associated code in the context of the returned connections
+                                actual_item_name = eval(socket.associated_code, {"__builtins__": None}, 
+                                                       {"connectionsIKarms": connections, "connectionsSpineIK": connections, "connectionsControl": connections, "connectionsFKChain": connections, "connectionsfoot": connections})
                             
-                            # Update the socket's associated code with the actual Maya item name
-                            socket.associated_code = actual_item_name
-                        except Exception as e:
-                            print(f"Error updating socket {socket_name}: {e}")
+                                # Update the socket's associated code with the actual Maya item name
+                                socket.associated_code = actual_item_name
+                            except Exception as e:
+                                print(f"Error updating socket {socket_name}: {e}")
                 
-                # Do the same for output sockets
-                for socket_name, socket in node_item.node_instance.output_sockets.items():
-                    if socket.associated_code:
-                        try:
-                            # Evaluate the associated code in the context of the returned connections
-                            actual_item_name = eval(socket.associated_code, {"__builtins__": None}, 
-                                                   {"connectionsIKarms": connections, "connectionsSpineIK": connections, "connectionsControl": connections, "connectionsFKChain": connections, "connectionsfoot": connections})
+                    # Do the same for output sockets
+                    for socket_name, socket in node_item.node_instance.output_sockets.items():
+                        if socket.associated_code:
+                            try:
+                                # Evaluate the associated code in the context of the returned connections
+                                actual_item_name = eval(socket.associated_code, {"__builtins__": None}, 
+                                                       {"connectionsIKarms": connections, "connectionsSpineIK": connections, "connectionsControl": connections, "connectionsFKChain": connections, "connectionsfoot": connections})
                             
-                            # Update the socket's associated code with the actual Maya item name
-                            socket.associated_code = actual_item_name
-                        except Exception as e:
-                            print(f"Error updating socket {socket_name}: {e}")
+                                # Update the socket's associated code with the actual Maya item name
+                                socket.associated_code = actual_item_name
+                            except Exception as e:
+                                print(f"Error updating socket {socket_name}: {e}")
                 
-                # Process connections for this node
-                self.process_node_connections(node_item)
+                    # Process connections for this node
+                    self.process_node_connections(node_item)
                 
                 print(f"Successfully re-rigged: {node_name}")
                 
@@ -376,6 +386,8 @@ class NodeContextMenu(QtWidgets.QMenu):
                     f"Connection Error: {connection.start_socket.name} to {connection.end_socket.name} - {str(e)}"
                 )
 
+        storeObjectsInJSON.flushGeneratedObjects()
+
         # Log the results
         if successful_connections:
             print(f"Connections for {node_item.node_instance.name}:")
@@ -1,15 +1,17 @@
 import maya.cmds as cmds  # type: ignore
-from functionality import importer, templateImporter, createOffsetGrp, matchTransform, createGroup, createJoints, constraintJointChains, createFKControls, setSelectedControlsColorAndLineWidth
-from storeObjectsInJSON import loadGeneratedObjects, cleanSpecificList, addObjectToList
-
-generatedObjects = loadGeneratedObjects()  # Load existing data from JSON file at the start
+from functionality import importer, templateImporter, templateNode, createOffsetGrp, matchTransform, createGroup, createJointChains, constraintDriverChains, createFKControls, setSelectedControlsColorAndLineWidth
+from storeObjectsInJSON import cleanSpecificList, buildSession
+from attributeBatch import batchAttributes
 
+@buildSession()
 def template(identifier = "NULL"):
     key = "CTRLTEMP_" + identifier
     cleanSpecificList(key)
     templateImporter("Scenes\\Templates\\control.ma", key)
 
 # Creates a two bone IK setup
+@buildSession()
+@batchAttributes()
 def Control(Control, Colour, identifier = "NULL"):
     cmds.select(clear=True)
 
@@ -17,12 +19,10 @@ def Control(Control, Colour, identifier = "NULL"):
     key = "CTRL_" + identifier
     tempKey = "CTRLTEMP_" + identifier
 
-    locators = ["control_LOC_" + tempKey]
+    locators = [templateNode("control_LOC", tempKey)]
     fkJointNames = ["control_FK_" + key + "_JNT"]
     envJointNames = ["control_ENV_" + key + "_JNT"]
 
-    fkJoints = []
-    envJoints = []
     locatorPositions = {}
 
     # Set the colour index
@@ -43,13 +43,12 @@ def Control(Control, Colour, identifier = "NULL"):
 
     cleanSpecificList(key)  # Clean any existing objects in the 'twoBoneIK' list
 
-    # FK Joints
-    createJoints(jointNames=fkJointNames, joints=fkJoints, locators=locators, locatorPositions=locatorPositions, key=key)
-    # ENV Joints
-    envJoitns = createJoints(jointNames=envJointNames, joints=envJoints, locators=locators, locatorPositions=locatorPositions, key=key)[0]
+    # FK and ENV Joints from a single read of the locators
+    chains = createJointChains(locators=locators, chains={"FK": fkJointNames, "ENV": envJointNames}, locatorPositions=locatorPositions, key=key)
+    fkJoints, envJoints = chains["FK"], chains["ENV"]
 
     # Create point and orientconstraints between ik, fk and env joints
-    constraintJointChains(rootJntOne=fkJoints[0], rootJntTwo=envJoints[0], key=key)
+    constraintDriverChains(driverChains=[fkJoints], drivenChain=envJoints, key=key)
 
     # Function to create fk controls and position them
     controlShape= "Scenes\\" + Control + ".ma"
@@ -65,7 +64,7 @@ def Control(Control, Colour, identifier = "NULL"):
     
     controlGroup = createGroup("controls", key)
     
-    controlGrp = createGroup("Control_RIG", key)
+    controlGrp = createGroup("Control_RIG", key, root=True)
     cmds.parent(controlGroup, controlGrp)
     cmds.parent(jointsGroup, controlGrp)
 
@@ -78,7 +77,7 @@ def Control(Control, Colour, identifier = "NULL"):
     ## Parent to base groups ##
 
     cmds.parent(controlGrp, "RIG_GRP_ALL")
-    cmds.hide("control_TEMPLATE_" + tempKey)
+    cmds.hide(templateNode("control_TEMPLATE", tempKey))
 
     # Ins and Outs
     ### Outs: Are like drivers, they control what happens to the inputs
@@ -87,6 +86,6 @@ def Control(Control, Colour, identifier = "NULL"):
     controlFK_in = fkControlOffsetGrps[0]
     scale_in = controlGrp
 
-    control_out = envJoitns[-1]
+    control_out = envJoints[-1]
 
     return scale_in, controlFK_in, control_out, key
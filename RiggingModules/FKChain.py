@@ -1,20 +1,23 @@
 import maya.cmds as cmds  # type: ignore
-from functionality import importer, templateImporter, createOffsetGrp, matchTransform, createGroup, createJoints, constraintJointChains, createFKControls, setSelectedControlsColorAndLineWidth, subdivideJointChain
-from storeObjectsInJSON import loadGeneratedObjects, cleanSpecificList, addObjectToList
-
-generatedObjects = loadGeneratedObjects()  # Load existing data from JSON file at the start
+from functionality import importer, templateImporter, templateNode, templateLocalName, createOffsetGrp, matchTransform, newHierarchy, buildHierarchy, groupName, createJointChains, constraintDriverChains, createFKControls, setSelectedControlsColorAndLineWidth, subdivideJointChain
+from storeObjectsInJSON import cleanSpecificList, buildSession
+from attributeBatch import batchAttributes
 
+@buildSession()
 def template(numJoints=3, identifier="NULL"):
     key = "FKCHNTEMP" + str(numJoints) + "_" + identifier
     cleanSpecificList(key)
     templateImporter("Scenes\\Templates\\FKChain" + "_0" + str(numJoints) +".ma", key)
 
 # Creates a two bone IK setup
+@buildSession()
+@batchAttributes()
 def FKChain(Control, Colour, numJoints, identifier = "NULL"):
     cmds.select(clear=True)
     tempKey = "FKCHNTEMP"
     # Adding the numControls at the end to determine the correct group to look through
-    TEMPGroupName = f"FKChain_TEMPLATE_0{numJoints}" + "_" + tempKey +  str(numJoints) + "_" + identifier
+    templateKey = tempKey + str(numJoints) + "_" + identifier
+    TEMPGroupName = templateNode(f"FKChain_TEMPLATE_0{numJoints}", templateKey)
     locators = []
 
     # Get locators from imported template and add them to the locator list
@@ -35,17 +38,15 @@ def FKChain(Control, Colour, numJoints, identifier = "NULL"):
 
     # loop though locators to create control joints and rename
     for loc in locators:
-        nameReplace = loc.replace("LOC", "FK_JNT")  # Replace "LOC" with "JNT"
+        nameReplace = templateLocalName(loc, templateKey).replace("LOC", "FK_JNT")  # Replace "LOC" with "JNT"
         newName = nameReplace
         FKJointNames.append(newName)
 
-        nameReplace = loc.replace("LOC", "ENV_JNT")  # Replace "LOC" with "JNT"
+        nameReplace = templateLocalName(loc, templateKey).replace("LOC", "ENV_JNT")  # Replace "LOC" with "JNT"
         newName = nameReplace
         ENVJointNames.append(newName)
 
     # Set up IK FK and ENV joints
-    fkJoints = []
-    envJoints = []
     locatorPositions = {}
 
     # Set the colour index
@@ -73,14 +74,12 @@ def FKChain(Control, Colour, numJoints, identifier = "NULL"):
     # Clean JSON file and scene before running script
     cleanSpecificList(key)
 
-    # FK joint chain
-    fkJoints, locatorPositions = createJoints(jointNames=FKJointNames, joints=fkJoints, locators=locators, locatorPositions=locatorPositions, key=key, radius=3, parent=True)
-
-    # ENV joint chain
-    envJoints, locatorPositions = createJoints(jointNames=ENVJointNames, joints=envJoints, locators=locators, locatorPositions=locatorPositions, key=key, radius=3, parent=True)
+    # FK and ENV joint chains from a single read of the locators
+    chains = createJointChains(locators=locators, chains={"FK": FKJointNames, "ENV": ENVJointNames}, locatorPositions=locatorPositions, key=key, radius=3, parent=True)
+    fkJoints, envJoints = chains["FK"], chains["ENV"]
 
     # Create point and orientconstraints between ik, fk and env joints
-    constraintJointChains(rootJntOne=fkJoints[0], rootJntTwo=envJoints[0], key=key)
+    constraintDriverChains(driverChains=[fkJoints], drivenChain=envJoints, key=key)
 
     # FK Controls
     fkControls,fkControlOffsetGrps = createFKControls(control= controlShape, fkChain=fkJoints, key=key)
@@ -88,26 +87,22 @@ def FKChain(Control, Colour, numJoints, identifier = "NULL"):
     # Colour Control
     setSelectedControlsColorAndLineWidth(colorIndex=colourIndex, importedControl=fkControls, lineWidth=2)
 
-    # Final Clean-Ups: Group remaining items
-    jointsGroup = createGroup("joints", key)
-    cmds.parent(fkJoints[0], jointsGroup)
-    cmds.parent(envJoints[0], jointsGroup)
-    
-    controlGroup = createGroup("controls", key)
-    
-    controlGrp = createGroup("Control_RIG", key)
-    cmds.parent(controlGroup, controlGrp)
-    cmds.parent(jointsGroup, controlGrp)
+    # Final Clean-Ups: Group remaining items, the groups and all parenting are created in one go
+    rigHierarchy = newHierarchy()
 
-    fkControlGroup = createGroup(name="FK_CTRL_GRP", key=key)
-
-    cmds.parent(fkControlOffsetGrps[0], fkControlGroup)
+    ## Parent to base groups ##
+    controlGrp = rigHierarchy.addGroup(groupName("Control_RIG", key), parent="RIG_GRP_ALL")
 
-    cmds.parent(fkControlGroup, controlGroup)
+    controlGroup = rigHierarchy.addGroup(groupName("controls", key), parent=controlGrp)
+    jointsGroup = rigHierarchy.addGroup(groupName("joints", key), parent=controlGrp)
+    rigHierarchy.parent(fkJoints[0], jointsGroup)
+    rigHierarchy.parent(envJoints[0], jointsGroup)
 
-    ## Parent to base groups ##
+    fkControlGroup = rigHierarchy.addGroup(groupName("FK_CTRL_GRP", key), parent=controlGroup)
+    rigHierarchy.parent(fkControlOffsetGrps[0], fkControlGroup)
 
-    cmds.parent(controlGrp, "RIG_GRP_ALL")
+    buildHierarchy(rigHierarchy, key, roots=[controlGrp])
+    controlGrp = rigHierarchy.name(controlGrp)
 
     # Ins and Outs
     ### Outs: Are like drivers, they control what happens to the inputs
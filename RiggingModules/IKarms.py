@@ -1,10 +1,10 @@
 import maya.cmds as cmds  # type: ignore
 from addon_SquashAndStretch import addon_SquashAndStretch
-from functionality import importer, templateImporter, createOffsetGrp, matchTransform, createGroup, createJoints, constraintJointChains, createFKControls, setupIKFKSwitch, setupIKFKVisibility, lockAttributes
-from storeObjectsInJSON import loadGeneratedObjects, cleanSpecificList, addObjectToList
-
-generatedObjects = loadGeneratedObjects()  # Load existing data from JSON file at the start
+from functionality import importer, templateImporter, templateNode, createOffsetGrp, matchTransform, newHierarchy, buildHierarchy, groupName, createJointChains, constraintDriverChains, createFKControls, setupIKFKSwitch, setupIKFKVisibility, lockAttributes
+from storeObjectsInJSON import cleanSpecificList, addObjectToList, buildSession
+from attributeBatch import batchAttributes
 
+@buildSession()
 def template(identifier = "NULL"):
     key = "TBIKTEMP_" + identifier
     cleanSpecificList(key)
@@ -12,6 +12,8 @@ def template(identifier = "NULL"):
     templateImporter("Scenes\\Templates\\twoBoneIK.ma", key)
 
 # Creates a two bone IK setup
+@buildSession()
+@batchAttributes()
 def twoBoneIK(twistJoints = 0, addon = "NULL", identifier = "NULL"):
     cmds.select(clear=True)
 
@@ -19,43 +21,36 @@ def twoBoneIK(twistJoints = 0, addon = "NULL", identifier = "NULL"):
     key = "TBIK_" + identifier
     tempKey = "TBIKTEMP_" + identifier
 
-    locators = ["shoulder_LOC_" + tempKey, "elbow_LOC_" + tempKey, "wrist_LOC_" + tempKey, "poleVec_LOC_" + tempKey]
+    locators = [templateNode("shoulder_LOC", tempKey), templateNode("elbow_LOC", tempKey), templateNode("wrist_LOC", tempKey), templateNode("poleVec_LOC", tempKey)]
     ikJointNames = ["shoulder_IK_" + key + "_JNT", "elbow_IK_" + key + "_JNT", "wrist_IK_" + key + "_JNT"]
     fkJointNames = ["shoulder_FK_" + key + "_JNT", "elbow_FK_" + key + "_JNT", "wrist_FK_" + key + "_JNT"]
     envJointNames = ["shoulder_ENV_" + key + "_JNT", "elbow_ENV_" + key + "_JNT", "wrist_ENV_" + key + "_JNT"]
 
-    ikJoints = []
-    fkJoints = []
-    envJoints = []
     locatorPositions = {}
     
 
     cleanSpecificList(key)  # Clean any existing objects in the 'twoBoneIK' list
 
-    ikArmsCurve = "ArmIK_Curve_" + tempKey
+    ikArmsCurve = templateNode("ArmIK_Curve", tempKey)
 
-    # IK Joints
-    jointsIK = createJoints(jointNames=ikJointNames, joints=ikJoints, locators=locators, locatorPositions=locatorPositions, key=key)[0]
-    # FK Joints
-    createJoints(jointNames=fkJointNames, joints=fkJoints, locators=locators, locatorPositions=locatorPositions, key=key)
-    # ENV Joints
-    envJoitns = createJoints(jointNames=envJointNames, joints=envJoints, locators=locators, locatorPositions=locatorPositions, key=key)[0]
+    # IK, FK and ENV Joints from a single read of the locators
+    chains = createJointChains(locators=locators, chains={"IK": ikJointNames, "FK": fkJointNames, "ENV": envJointNames}, locatorPositions=locatorPositions, key=key)
+    ikJoints, fkJoints, envJoints = chains["IK"], chains["FK"], chains["ENV"]
 
     # Create point and orientconstraints between ik, fk and env joints
-    constraintJointChains(rootJntOne=ikJoints[0], rootJntTwo=envJoints[0], key=key)
-    constraintJointChains(rootJntOne=fkJoints[0], rootJntTwo=envJoints[0], key=key)
+    switchWeights = constraintDriverChains(driverChains=[ikJoints, fkJoints], drivenChain=envJoints, key=key)
 
     # Function to create fk controls and position them
     fkControls,fkControlOffsetGrps = createFKControls(control="Scenes\\circle.ma", fkChain=fkJoints, key=key, rotOffset=[0,90,0])
 
     switchControl = importer(item="Scenes\\arrow.ma", name="Arm_Settings_" + key, key=key, scale = [0.25, 0.25, 0.25], lineWidth=2.0, colour=6)
-    setupIKFKSwitch(envChain=envJoints, fkChain=fkJoints, ikChain=ikJoints, switchCtrl=switchControl, key=key )
+    setupIKFKSwitch(envChain=envJoints, fkChain=fkJoints, ikChain=ikJoints, switchCtrl=switchControl, key=key, weights=switchWeights)
     switchOffsetGrp = createOffsetGrp(item=switchControl, key=key)
     matchTransform(source=switchOffsetGrp, target=locators[1], transOffset=[0,4,0], rotOffset=[90,0,90])
 
     # Create IK arm control and move it into place
     armControl = importer(item="Scenes\\cube.ma", name="Arm_CTRL_" + key , key=key, colour=17)
-    wristPos = locatorPositions.get("wrist_LOC_" + tempKey)
+    wristPos = locatorPositions.get(templateNode("wrist_LOC", tempKey))
     cmds.xform(armControl, worldSpace=True, translation=wristPos)
     cmds.makeIdentity(armControl, apply=True, translate=True, rotate=True, scale=True, normal=False)
     armControlOffsetGrp = createOffsetGrp(armControl, key)
@@ -63,20 +58,20 @@ def twoBoneIK(twistJoints = 0, addon = "NULL", identifier = "NULL"):
     # Create IK solver
     ikHandle = cmds.ikHandle(name="ArmIKHandle_" + key, startJoint=ikJoints[0], endEffector=ikJoints[-1], solver="ikRPsolver")[0]
     cmds.parent(ikHandle, armControl)
-    addObjectToList(key, ikHandle)
+    addObjectToList(key, ikHandle, "ikHandle")
 
     # Create pole vector
     poleVectorControl = importer(item="Scenes\\circlePinched.ma", name="PoleVec_CTRL_" + key, key=key, colour=13)
     matchTransform(poleVectorControl, locators[3])
     poleVectorOffsetGrp = createOffsetGrp(poleVectorControl, key)
     poleVector = cmds.poleVectorConstraint(poleVectorControl, ikHandle)[0]
-    addObjectToList(key, poleVector)
+    addObjectToList(key, poleVector, "poleVectorConstraint")
 
     # Create curve and the clusters for each cv parenting the last cv to arm control so the curve stretches but doesnt compress
-    duplicatedCurve = cmds.duplicate(ikArmsCurve, name=ikArmsCurve + "_IK_" + key)[0]
+    duplicatedCurve = cmds.duplicate(ikArmsCurve, name="ArmIK_Curve_" + tempKey + "_IK_" + key)[0]
     cmds.parent(duplicatedCurve, world=True)
     cmds.setAttr(duplicatedCurve + ".template", 0)
-    addObjectToList(key, duplicatedCurve)
+    addObjectToList(key, duplicatedCurve, "transform")
 
     duplicatedCurveShape = cmds.listRelatives(duplicatedCurve, shapes=True)[0]
 
@@ -109,37 +104,34 @@ def twoBoneIK(twistJoints = 0, addon = "NULL", identifier = "NULL"):
     # IK-FK switching visibility
     setupIKFKVisibility(fkControls=fkControls, ikControls=[armControl, poleVectorControl], switchCtrl=switchControl, key=key)
 
-    # Final Clean-Ups: Group remaining items
-    jointsGroup = createGroup("joints", key)
-    cmds.parent(ikJoints[0], jointsGroup)
-    cmds.parent(fkJoints[0], jointsGroup)
-    cmds.parent(envJoints[0], jointsGroup)
-    
-    controlGroup = createGroup("controls", key)
-    
-    twoBoneIKGrp = createGroup("armIK_RIG", key)
-    cmds.parent(controlGroup, twoBoneIKGrp)
-    cmds.parent(jointsGroup, twoBoneIKGrp)
+    # Final Clean-Ups: Group remaining items, the groups and all parenting are created in one go
+    rigHierarchy = newHierarchy()
 
-    ikControlGroup = createGroup(name="IK_CTRL_GRP", key=key)
-    fkControlGroup = createGroup(name="FK_CTRL_GRP", key=key)
+    ## Parent to base groups ##
+    twoBoneIKGrp = rigHierarchy.addGroup(groupName("armIK_RIG", key), parent="RIG_GRP_ALL")
 
-    cmds.parent(fkControlOffsetGrps[0], fkControlGroup)
-    cmds.parent(poleVectorOffsetGrp, ikControlGroup)
-    cmds.parent(armControlOffsetGrp, ikControlGroup)
+    controlGroup = rigHierarchy.addGroup(groupName("controls", key), parent=twoBoneIKGrp)
 
-    cmds.parent(ikControlGroup, controlGroup)
-    cmds.parent(fkControlGroup, controlGroup)
-    cmds.parent(switchOffsetGrp, controlGroup)
+    jointsGroup = rigHierarchy.addGroup(groupName("joints", key), parent=twoBoneIKGrp)
+    rigHierarchy.parent(ikJoints[0], jointsGroup)
+    rigHierarchy.parent(fkJoints[0], jointsGroup)
+    rigHierarchy.parent(envJoints[0], jointsGroup)
 
-    curveGroup = createGroup("curve", key)
-    cmds.parent(curveClusters, curveGroup)
-    cmds.parent(duplicatedCurve, curveGroup)
-    cmds.parent(curveGroup, twoBoneIKGrp)
+    ikControlGroup = rigHierarchy.addGroup(groupName("IK_CTRL_GRP", key), parent=controlGroup)
+    fkControlGroup = rigHierarchy.addGroup(groupName("FK_CTRL_GRP", key), parent=controlGroup)
 
-    ## Parent to base groups ##
+    rigHierarchy.parent(fkControlOffsetGrps[0], fkControlGroup)
+    rigHierarchy.parent(poleVectorOffsetGrp, ikControlGroup)
+    rigHierarchy.parent(armControlOffsetGrp, ikControlGroup)
+    rigHierarchy.parent(switchOffsetGrp, controlGroup)
+
+    curveGroup = rigHierarchy.addGroup(groupName("curve", key), parent=twoBoneIKGrp)
+    for cluster in curveClusters:
+        rigHierarchy.parent(cluster, curveGroup)
+    rigHierarchy.parent(duplicatedCurve, curveGroup)
 
-    cmds.parent(twoBoneIKGrp, "RIG_GRP_ALL")
+    buildHierarchy(rigHierarchy, key, roots=[twoBoneIKGrp])
+    twoBoneIKGrp = rigHierarchy.name(twoBoneIKGrp)
 
     # Final Clean-Ups: Lock and hide attributes
     lockAttributes(item=switchControl, vis= 1, trans = 1, rot = 1, scale = 1, hidden = 1)
@@ -150,17 +142,17 @@ def twoBoneIK(twistJoints = 0, addon = "NULL", identifier = "NULL"):
     ### Outs: Are like drivers, they control what happens to the inputs
     ### Ins: Are like the driven, they are being controlled by the outputs
 
-    shoulderIK_in = jointsIK[0]
+    shoulderIK_in = ikJoints[0]
     poleVectorIK_in = poleVectorOffsetGrp
     shoulderFK_in = fkControlOffsetGrps[0]
     scale_in = twoBoneIKGrp
 
-    wrist_out = envJoitns[-1]
+    wrist_out = envJoints[-1]
 
     ### Add-ons ###
     # If an addon is added, determine which one and call the corresponding function
     scaleAxis = "X"
     if addon == "SquashAndStretch":
-        addon_SquashAndStretch(jointsIK, fkJoints, envJoitns, switchControl, duplicatedCurve, scaleAxis, identifier)
+        addon_SquashAndStretch(ikJoints, fkJoints, envJoints, switchControl, duplicatedCurve, scaleAxis, identifier)
 
     return scale_in, shoulderIK_in, poleVectorIK_in, shoulderFK_in, wrist_out, key
\ No newline at end of file
@@ -1,9 +1,8 @@
 import maya.cmds as cmds  # type: ignore
 from functionality import importer, templateImporter, createOffsetGrp, matchTransform, createGroup, createJoints, constraintJointChains, createFKControls, setSelectedControlsColorAndLineWidth
-from storeObjectsInJSON import loadGeneratedObjects, cleanSpecificList, addObjectToList
-
-generatedObjects = loadGeneratedObjects()  # Load existing data from JSON file at the start
+from storeObjectsInJSON import cleanSpecificList, addObjectToList, buildSession
 
+@buildSession()
 def addon_SquashAndStretch(ikChain, fkChain, envChain, switch, ikCurve , scaleAxis, identifier):
     cmds.select(clear=True)
 
@@ -15,14 +14,14 @@ def addon_SquashAndStretch(ikChain, fkChain, envChain, switch, ikCurve , scaleAx
 
     # Create the curveInfo node
     curveInfo = cmds.createNode('curveInfo', name=f'{curveShape}_curveInfo' + key)
-    addObjectToList(key, curveInfo)
+    addObjectToList(key, curveInfo, "curveInfo")
 
     # Connect worldSpace[0] of shape to inputCurve of curveInfo
     cmds.connectAttr(f'{curveShape}.worldSpace[0]', f'{curveInfo}.inputCurve', force=True)
     
     # Create the multiply/divide node
     multiplyDivideNode = cmds.createNode('multiplyDivide', name=f'{curveShape}_multiplyDivide_{key}')
-    addObjectToList(key, multiplyDivideNode)
+    addObjectToList(key, multiplyDivideNode, "multiplyDivide")
     
     # Set the operation to divide
     cmds.setAttr(f"{multiplyDivideNode}.operation", 2)  # 2 = divide
@@ -56,7 +55,7 @@ def addon_SquashAndStretch(ikChain, fkChain, envChain, switch, ikCurve , scaleAx
 
     # Create inverse multiply divide node and inverse the arc length
     multiplyDivideNodeInverse = cmds.createNode('multiplyDivide', name=f'{curveShape}_multiplyDivideInverse_{key}')
-    addObjectToList(key, multiplyDivideNodeInverse)
+    addObjectToList(key, multiplyDivideNodeInverse, "multiplyDivide")
     # Set the operation to power
     cmds.setAttr(f"{multiplyDivideNodeInverse}.operation", 3)  # 2 = power
     cmds.setAttr(f"{multiplyDivideNodeInverse}.input2X", -1)
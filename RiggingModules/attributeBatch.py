@@ -0,0 +1,142 @@
+import maya.cmds as cmds  # type: ignore
+import maya.api.OpenMaya as om2  # type: ignore
+from contextlib import contextmanager
+
+# Plug edits made while a module is built are collected here and written in one go through OpenMaya
+# instead of one cmds.setAttr per channel. Edits made outside of batchAttributes() are applied right away.
+# While undo is on the batch is written with cmds.setAttr instead, so the edits can be undone with the build.
+
+# Open batches, innermost last
+_activeBatches = []
+
+class AttributeBatch(object):
+    """
+    Collects plug values and lock/hide flags and applies them with a single MDGModifier.
+
+    Values are written in Maya's internal units. The modifier is not undoable, so while undo
+    is on the same edits are made with cmds.setAttr. Nodes are resolved when an edit is
+    queued, so renaming or reparenting them before apply() does not lose the edit. A missing
+    node or plug is skipped with a warning, like a failed cmds.setAttr in a build.
+    """
+
+    def __init__(self):
+        self._values = []
+        self._locks = []
+
+    def __len__(self):
+        return len(self._values) + len(self._locks)
+
+    def set(self, node, attribute, value):
+        """Queues a bool, int or float value for node.attribute."""
+        handle = _nodeHandle(node, attribute)
+        if handle is not None:
+            self._values.append((handle, node, attribute, value))
+
+    def lock(self, node, attribute, hide=False):
+        """Queues locking node.attribute and making it non-keyable, hide also removes it from the channel box."""
+        handle = _nodeHandle(node, attribute)
+        if handle is not None:
+            self._locks.append((handle, node, attribute, hide))
+
+    def extend(self, other):
+        """Appends the edits of another batch, keeping their order."""
+        self._values.extend(other._values)
+        self._locks.extend(other._locks)
+
+    def _resolvePlugs(self, edits):
+        # The handles survive renames and reparenting, a node deleted since it was queued is skipped
+        plugs = []
+        for handle, node, attribute, value in edits:
+            if not handle.isValid():
+                cmds.warning(f"Skipped {node}.{attribute}: the node no longer exists")
+                continue
+            try:
+                plug = om2.MFnDependencyNode(handle.object()).findPlug(attribute, False)
+            except RuntimeError as e:
+                cmds.warning(f"Failed to find {node}.{attribute}: {e}")
+                continue
+            plugs.append((plug, value))
+        return plugs
+
+    def apply(self):
+        """Writes all queued values in one modifier, then sets the lock flags, and empties the batch."""
+        values, locks = self._values, self._locks
+        self._values, self._locks = [], []
+
+        if cmds.undoInfo(query=True, state=True):
+            for plug, value in self._resolvePlugs(values):
+                cmds.setAttr(_plugPath(plug), value)
+            for plug, hide in self._resolvePlugs(locks):
+                cmds.setAttr(_plugPath(plug), lock=True, keyable=False)
+                if hide:
+                    cmds.setAttr(_plugPath(plug), channelBox=False)
+            return
+
+        # Values first, a locked plug would refuse them
+        modifier = om2.MDGModifier()
+        for plug, value in self._resolvePlugs(values):
+            if isinstance(value, bool):
+                modifier.newPlugValueBool(plug, value)
+            elif isinstance(value, int):
+                modifier.newPlugValueInt(plug, value)
+            else:
+                modifier.newPlugValueDouble(plug, value)
+        if values:
+            modifier.doIt()
+
+        for plug, hide in self._resolvePlugs(locks):
+            plug.isKeyable = False
+            plug.isLocked = True
+            if hide:
+                plug.isChannelBox = False
+
+@contextmanager
+def batchAttributes():
+    """
+    Queues every setAttribute and lockAttribute call made inside the block and applies them
+    together when it ends. Nested blocks hand their edits to the outer one. Also usable as a
+    decorator: @batchAttributes(). Nothing is applied when the block raises.
+    """
+    batch = AttributeBatch()
+    _activeBatches.append(batch)
+    try:
+        yield batch
+    finally:
+        _activeBatches.pop()
+    if _activeBatches:
+        _activeBatches[-1].extend(batch)
+    else:
+        batch.apply()
+
+def _nodeHandle(node, attribute):
+    # Resolves a node name once, when the edit is queued, None with a warning if it does not exist
+    selection = om2.MSelectionList()
+    try:
+        selection.add(node)
+    except RuntimeError as e:
+        cmds.warning(f"Failed to find node {node} to edit {attribute}: {e}")
+        return None
+    return om2.MObjectHandle(selection.getDependNode(0))
+
+def _plugPath(plug):
+    # Full "node.attribute" name of a plug for cmds, unique even when the short node name is not
+    node = plug.node()
+    nodeName = om2.MDagPath.getAPathTo(node).fullPathName() if node.hasFn(om2.MFn.kDagNode) else om2.MFnDependencyNode(node).name()
+    return nodeName + "." + plug.partialName(useLongNames=True)
+
+def _targetBatch():
+    return _activeBatches[-1] if _activeBatches else AttributeBatch()
+
+def setAttribute(node, attribute, value):
+    """Sets node.attribute to a bool, int or float value, deferred while a batch is open."""
+    batch = _targetBatch()
+    batch.set(node, attribute, value)
+    if not _activeBatches:
+        batch.apply()
+
+def lockAttribute(node, attribute, hide=False):
+    """Locks node.attribute and makes it non-keyable, deferred while a batch is open."""
+    batch = _targetBatch()
+    batch.lock(node, attribute, hide)
+    if not _activeBatches:
+        batch.apply()
@@ -0,0 +1,67 @@
+import maya.cmds as cmds  # type: ignore
+import functionality
+import FKChain
+import IKarms
+import splineSpineIK
+from storeObjectsInJSON import cleanSpecificList
+
+# Builds rig modules once per connection mode and reports how many nodes of each type every build leaves in the scene.
+# Run inside Maya, preferably in an empty scene:
+#   import benchmarkConnectionModes; benchmarkConnectionModes.run()
+
+IDENTIFIER = "MODEBENCH"
+
+# (label, template call, build call, keys to clean afterwards, build key first)
+MODULES = [
+    ("FKChain 5 joints",
+     lambda: FKChain.template(numJoints=5, identifier=IDENTIFIER),
+     lambda: FKChain.FKChain(Control="circle", Colour="red", numJoints=5, identifier=IDENTIFIER),
+     ["FKCHN5_" + IDENTIFIER, "FKCHNTEMP5_" + IDENTIFIER]),
+    ("twoBoneIK",
+     lambda: IKarms.template(identifier=IDENTIFIER),
+     lambda: IKarms.twoBoneIK(identifier=IDENTIFIER),
+     ["TBIK_" + IDENTIFIER, "TBIKTEMP_" + IDENTIFIER]),
+    ("splineSpineIK 50 joints",
+     lambda: splineSpineIK.template(numControlJoints=3, identifier=IDENTIFIER),
+     lambda: splineSpineIK.splineSpineIK(numControlJoints=3, identifier=IDENTIFIER, numJoints=50),
+     ["SSIK3_" + IDENTIFIER, "SSIKTEMP3_" + IDENTIFIER]),
+]
+
+# Returns {node type: count} of the nodes a build adds to the scene
+def countNewNodes(build, baseline):
+    build()
+    counts = {}
+    for node in set(cmds.ls(long=True)) - baseline:
+        nodeType = cmds.nodeType(node)
+        counts[nodeType] = counts.get(nodeType, 0) + 1
+    return counts
+
+def run(modules=MODULES):
+    """Prints the node counts per type of each module in constraint and matrix mode."""
+    for group in ("RIG_TEMP_GRP_ALL", "RIG_GRP_ALL"):
+        if not cmds.objExists(group):
+            cmds.group(empty=True, name=group)
+
+    results = {}
+    for label, template, build, keys in modules:
+        template()
+        baseline = set(cmds.ls(long=True))
+        counts = {}
+        try:
+            for mode in ("constraint", "matrix"):
+                # Each build cleans up the previous one under the same key first
+                with functionality.connectionMode(mode):
+                    counts[mode] = countNewNodes(build, baseline)
+        finally:
+            for key in keys:
+                cleanSpecificList(key)
+        results[label] = counts
+
+        print(f"{label}")
+        nodeTypes = sorted(set(counts["constraint"]) | set(counts["matrix"]))
+        for nodeType in nodeTypes:
+            constraintCount, matrixCount = counts["constraint"].get(nodeType, 0), counts["matrix"].get(nodeType, 0)
+            if constraintCount != matrixCount:
+                print(f"  {nodeType:24s} {constraintCount:6d} {matrixCount:6d}")
+        print(f"  {'total':24s} {sum(counts['constraint'].values()):6d} {sum(counts['matrix'].values()):6d}   (constraint, matrix)")
+    return results
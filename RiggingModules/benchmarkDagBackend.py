@@ -0,0 +1,53 @@
+import time
+import maya.cmds as cmds  # type: ignore
+import functionality
+from storeObjectsInJSON import cleanSpecificList
+
+# Compares the cmds and om2 DAG backends of functionality on a 100 joint spine: IK, FK and ENV chains made with
+# subdivideJointChain, plus the module groups and parenting. Run inside Maya, preferably in an empty scene:
+#   import benchmarkDagBackend; benchmarkDagBackend.run()
+
+BENCHMARK_KEY = "DAGBENCH"
+
+# Builds the three joint chains and the module groups of a spine with numJoints joints per chain
+def buildSpine(numJoints, key):
+    cmds.select(clear=True)
+    start = cmds.joint(name="benchStart_" + key, position=(0, 0, 0))
+    cmds.select(clear=True)
+    end = cmds.joint(name="benchEnd_" + key, position=(0, numJoints, 0))
+
+    chains = [functionality.subdivideJointChain([start, end], numJoints - 2, key, name="spine_" + chain, nameFirstJoint="pelvis_" + chain)
+              for chain in ("IK", "FK", "ENV")]
+    cmds.delete(start, end)
+
+    hierarchy = functionality.newHierarchy()
+    rigGroup = hierarchy.addGroup(functionality.groupName("benchSpine_RIG", key))
+    jointsGroup = hierarchy.addGroup(functionality.groupName("joints", key), parent=rigGroup)
+    hierarchy.addGroup(functionality.groupName("controls", key), parent=rigGroup)
+    for chain in chains:
+        hierarchy.parent(chain[0], jointsGroup)
+    functionality.buildHierarchy(hierarchy, key, roots=[rigGroup])
+
+def run(numJoints=100, repeats=5):
+    """Prints the best and average build time of each backend."""
+    previousBackend = functionality.DAG_BACKEND
+    results = {}
+    try:
+        for backend in ("cmds", "om2"):
+            functionality.DAG_BACKEND = backend
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                buildSpine(numJoints, BENCHMARK_KEY)
+                timings.append(time.perf_counter() - start)
+                cleanSpecificList(BENCHMARK_KEY)
+            results[backend] = timings
+    finally:
+        functionality.DAG_BACKEND = previousBackend
+
+    print(f"{numJoints} joint spine, {repeats} runs each")
+    for backend, timings in results.items():
+        print(f"  {backend:5s} best {min(timings) * 1000.0:8.1f} ms   average {sum(timings) / len(timings) * 1000.0:8.1f} ms")
+    speedup = min(results["cmds"]) / min(results["om2"])
+    print(f"  om2 is {speedup:.1f}x the speed of cmds")
+    return results
@@ -0,0 +1,38 @@
+import time
+import maya.cmds as cmds  # type: ignore
+import functionality
+from storeObjectsInJSON import cleanSpecificList
+
+# Times createCurveJointChains, the IK, FK and ENV chains of splineSpineIK, for growing joint counts and prints the
+# time per joint, which should stay flat if the build scales linearly. Run inside Maya, preferably in an empty scene:
+#   import benchmarkSpineChains; benchmarkSpineChains.run()
+
+BENCHMARK_KEY = "SPINEBENCH"
+SIZES = [10, 100, 250, 500, 1000]
+
+# Builds the three chains of a spine with numJoints joints per chain along curve
+def buildChains(curve, numJoints, key):
+    chains = {"IK": ("spine_IK", "pelvis_IK"), "FK": ("spine_FK", "pelvis_FK"), "ENV": ("spine_ENV", "pelvis_ENV")}
+    return functionality.createCurveJointChains(curve, (0, 0, 0), numJoints - 2, chains, key)
+
+def run(sizes=SIZES, repeats=3):
+    """Prints the best build time and the time per joint for every chain length."""
+    curve = cmds.curve(name="benchSpineCurve", degree=3, point=[(0, 0, 0), (0, 3, 1), (0, 7, -1), (0, 10, 0)])
+    results = {}
+    try:
+        for numJoints in sizes:
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                buildChains(curve, numJoints, BENCHMARK_KEY)
+                timings.append(time.perf_counter() - start)
+                cleanSpecificList(BENCHMARK_KEY)
+            results[numJoints] = min(timings)
+    finally:
+        cmds.delete(curve)
+
+    print(f"IK, FK and ENV chains along a curve, best of {repeats} runs")
+    for numJoints, best in results.items():
+        totalJoints = numJoints * 3
+        print(f"  {numJoints:5d} joints per chain  {best * 1000.0:9.1f} ms   {best * 1000000.0 / totalJoints:7.1f} us per joint")
+    return results
@@ -0,0 +1,59 @@
+import time
+import maya.cmds as cmds  # type: ignore
+import functionality
+import splineSpineIK
+from storeObjectsInJSON import cleanSpecificList
+
+# Compares a splineSpineIK build recorded command by command, as one undo chunk and in fast build mode (undo off),
+# reporting the build time and how much Maya's heap grew. Run inside Maya, preferably in an empty scene; it flushes
+# the undo queue between modes:
+#   import benchmarkUndoModes; benchmarkUndoModes.run()
+
+IDENTIFIER = "UNDOBENCH"
+NUM_CONTROL_JOINTS = 3
+BUILD_KEY = "SSIK" + str(NUM_CONTROL_JOINTS) + "_" + IDENTIFIER
+TEMPLATE_KEY = "SSIKTEMP" + str(NUM_CONTROL_JOINTS) + "_" + IDENTIFIER
+
+def build(numJoints):
+    splineSpineIK.splineSpineIK(numControlJoints=NUM_CONTROL_JOINTS, identifier=IDENTIFIER, numJoints=numJoints)
+
+def heapMegabytes():
+    return cmds.memory(heapMemory=True, megaByte=True)
+
+def run(numJoints=50, repeats=3):
+    """Prints the best build time and the heap growth over all repeats of each undo mode."""
+    for group in ("RIG_TEMP_GRP_ALL", "RIG_GRP_ALL"):
+        if not cmds.objExists(group):
+            cmds.group(empty=True, name=group)
+    splineSpineIK.template(numControlJoints=NUM_CONTROL_JOINTS, identifier=IDENTIFIER)
+
+    previousFastBuild = functionality.FAST_BUILD
+    results = {}
+    try:
+        for mode in ("per command", "undo chunk", "fast build"):
+            functionality.setFastBuild(mode == "fast build")
+            cmds.flushUndo()
+            heapBefore = heapMegabytes()
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                if mode == "per command":
+                    build(numJoints)
+                else:
+                    with functionality.buildUndo("Undo benchmark"):
+                        build(numJoints)
+                timings.append(time.perf_counter() - start)
+            results[mode] = (min(timings), heapMegabytes() - heapBefore)
+            cleanSpecificList(BUILD_KEY)
+    finally:
+        functionality.setFastBuild(previousFastBuild)
+        cleanSpecificList(BUILD_KEY)
+        cleanSpecificList(TEMPLATE_KEY)
+        cmds.flushUndo()
+
+    print(f"splineSpineIK with {numJoints} joints, {repeats} builds per mode")
+    baseTime, baseHeap = results["per command"]
+    for mode, (best, heapGrowth) in results.items():
+        print(f"  {mode:12s} best {best * 1000.0:8.1f} ms ({(baseTime - best) * 1000.0:+8.1f} ms saved)"
+              f"   heap +{heapGrowth:7.1f} MB ({baseHeap - heapGrowth:+7.1f} MB saved)")
+    return results
@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import time
+import importlib
+from contextlib import contextmanager
+import maya.cmds as cmds  # type: ignore
+
+# Opt-in instrumentation of maya.cmds: the cmds global of the rigging modules is swapped for a proxy that counts and
+# times every command together with the module and function that called it. Nothing is wrapped unless a profile is
+# running, e.g.
+#   with cmdsProfiler.profileCmds("twoBoneIK", jsonPath="twoBoneIK_cmds.json"):
+#       IKarms.twoBoneIK(identifier="L")
+
+# When True, the node editor profiles every re-rig and prints a report per module
+PROFILE_BUILDS = False
+# Directory the node editor writes <module>_cmdsProfile.json to, None only prints the report
+PROFILE_DIRECTORY = None
+
+# Modules whose cmds global is wrapped by default
+PROFILED_MODULES = ["functionality", "storeObjectsInJSON", "attributeBatch", "dagBuilder", "controlShapeLibrary",
+                    "IKarms", "foot", "FKChain", "Control", "splineSpineIK", "addon_SquashAndStretch"]
+
+# Switches profiling of node editor builds on or off
+def setProfileBuilds(enabled, directory=None):
+    global PROFILE_BUILDS, PROFILE_DIRECTORY
+    PROFILE_BUILDS = enabled
+    PROFILE_DIRECTORY = directory
+
+class CmdsProfiler(object):
+    """
+    Records call counts and cumulative time per cmds command and per calling module.function.
+
+    install() replaces the cmds global of the profiled modules with a proxy, uninstall()
+    puts the real module back. Time of nested commands is counted in each of them.
+    """
+
+    def __init__(self, label="build"):
+        self.label = label
+        self.stats = {}
+        self.totalTime = 0.0
+        self._installed = {}
+
+    def record(self, command, caller, elapsed):
+        entry = self.stats.setdefault(command, {"calls": 0, "time": 0.0, "callers": {}})
+        entry["calls"] += 1
+        entry["time"] += elapsed
+        callerEntry = entry["callers"].setdefault(caller, {"calls": 0, "time": 0.0})
+        callerEntry["calls"] += 1
+        callerEntry["time"] += elapsed
+
+    def install(self, moduleNames=PROFILED_MODULES):
+        """Wraps the cmds global of every named module that can be imported."""
+        proxy = _CmdsProxy(self)
+        for name in moduleNames:
+            try:
+                module = sys.modules.get(name) or importlib.import_module(name)
+            except ImportError:
+                continue
+            if getattr(module, "cmds", None) is cmds:
+                self._installed[name] = module
+                module.cmds = proxy
+        self._start = time.perf_counter()
+
+    def uninstall(self):
+        """Restores the real cmds module everywhere it was wrapped."""
+        for module in self._installed.values():
+            module.cmds = cmds
+        self._installed = {}
+        self.totalTime += time.perf_counter() - self._start
+
+    def asDict(self):
+        """Returns the stats sorted by cumulative time, callers included."""
+        commands = []
+        for command, entry in sorted(self.stats.items(), key=lambda item: item[1]["time"], reverse=True):
+            callers = [{"caller": caller, "calls": callerEntry["calls"], "time": callerEntry["time"]}
+                       for caller, callerEntry in sorted(entry["callers"].items(), key=lambda item: item[1]["time"], reverse=True)]
+            commands.append({"command": command, "calls": entry["calls"], "time": entry["time"], "callers": callers})
+        return {"label": self.label, "totalTime": self.totalTime, "commands": commands}
+
+    def report(self, limit=20, callersPerCommand=3):
+        """Returns a printable table of the slowest commands and their top callers."""
+        data = self.asDict()
+        cmdsTime = sum(entry["time"] for entry in data["commands"])
+        lines = [f"cmds profile of {self.label}: {data['totalTime'] * 1000.0:.1f} ms total, "
+                 f"{sum(entry['calls'] for entry in data['commands'])} calls"]
+        for entry in data["commands"][:limit]:
+            share = entry["time"] / cmdsTime * 100.0 if cmdsTime else 0.0
+            lines.append(f"  {entry['command']:24s} {entry['calls']:7d} calls {entry['time'] * 1000.0:10.1f} ms {share:5.1f}%")
+            for caller in entry["callers"][:callersPerCommand]:
+                lines.append(f"      {caller['caller']:44s} {caller['calls']:7d} {caller['time'] * 1000.0:10.1f} ms")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """Writes the stats to a JSON file."""
+        with open(path, 'w') as file:
+            json.dump(self.asDict(), file, indent=2)
+
+class _CmdsProxy(object):
+    # Stands in for maya.cmds, every callable is timed and attributed to the frame that called it
+    def __init__(self, profiler):
+        self._profiler = profiler
+        self._wrapped = {}
+
+    def __getattr__(self, name):
+        attribute = getattr(cmds, name)
+        if not callable(attribute):
+            return attribute
+        if name not in self._wrapped:
+            profiler = self._profiler
+
+            def timedCommand(*args, **kwargs):
+                frame = sys._getframe(1)
+                caller = f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+                start = time.perf_counter()
+                try:
+                    return attribute(*args, **kwargs)
+                finally:
+                    profiler.record(name, caller, time.perf_counter() - start)
+
+            self._wrapped[name] = timedCommand
+        return self._wrapped[name]
+
+@contextmanager
+def profileCmds(label="build", jsonPath=None, moduleNames=PROFILED_MODULES, printReport=True):
+    """Profiles the cmds calls made inside the block, then prints the report and writes the JSON dump if asked."""
+    profiler = CmdsProfiler(label)
+    profiler.install(moduleNames)
+    try:
+        yield profiler
+    finally:
+        profiler.uninstall()
+        if printReport:
+            print(profiler.report())
+        if jsonPath:
+            profiler.dump(jsonPath)
+
+@contextmanager
+def profileBuild(label):
+    """profileCmds for a node editor build when PROFILE_BUILDS is on, otherwise does nothing."""
+    if not PROFILE_BUILDS:
+        yield None
+        return
+    jsonPath = os.path.join(PROFILE_DIRECTORY, f"{label}_cmdsProfile.json") if PROFILE_DIRECTORY else None
+    with profileCmds(label, jsonPath) as profiler:
+        yield profiler
@@ -0,0 +1,205 @@
+import os
+import re
+import json
+import maya.cmds as cmds  # type: ignore
+import maya.api.OpenMaya as om2  # type: ignore
+from registryBackends import writeJSONAtomic
+
+# Cache of control curve data (degree, form, knots, CVs per shape, plus the pivot) read from the Scenes/*.ma files.
+# Controls are rebuilt with cmds.curve from this data instead of importing a whole scene per control.
+# Each entry remembers the mtime of its .ma file and is re-read when the file changes. The cache file is generated per
+# machine and not versioned. Shapes built by construction history (makeNurbCircle in circle.ma and circlePinched.ma)
+# cannot be parsed without Maya; they are imported once on first use, or up front with
+# buildShapeCache(directory, readFromMaya=True) run inside Maya.
+
+CACHE_FILE_NAME = "controlShapes.json"
+
+# In-memory cache: {absolute .ma path: {"mtime": float, "curves": [curve data], "pivot": [x, y, z]}}
+_shapeCache = {}
+_loadedCacheFiles = set()
+
+_CREATE_NODE = re.compile(r'^createNode (\w+)( -s)? -n "([^"]+)"(?: -p "([^"]+)")?')
+_CURVE_ATTR = re.compile(r'^\s*setAttr "\.cc" -type "nurbsCurve"')
+# Attributes that change how a curve looks without being part of its .cc data
+_SHAPE_CHANGING_ATTR = re.compile(r'^\s*setAttr (?:-s \d+ )?"\.(?:cp|t|r|s)(?:\[|")')
+_PIVOT_ATTR = re.compile(r'^\s*setAttr "\.rp" -type "double3" (\S+) (\S+) (\S+)')
+
+def cacheFilePath(directory):
+    return os.path.join(directory, CACHE_FILE_NAME)
+
+def parseMayaAsciiCurves(path):
+    """
+    Reads the curve data of every nurbsCurve in a .ma file without Maya.
+
+    Returns {"curves": [{"degree", "form", "knots", "cvs"}, ...], "pivot": [x, y, z]}, or None when the file
+    cannot be represented that way (curves driven by construction history such as
+    makeNurbCircle, CV tweaks, or a transformed control), in which case the data has
+    to be read from Maya instead.
+    """
+    curves = []
+    pivot = [0.0, 0.0, 0.0]
+    curveNodes = 0
+    currentType = None
+    tokens = None
+    with open(path, 'r') as file:
+        for line in file:
+            if tokens is not None:
+                # Collecting the values of a .cc block until the closing ";"
+                tokens.extend(line.replace(";", " ").split())
+                if ";" in line:
+                    curves.append(curveFromTokens(tokens))
+                    tokens = None
+                continue
+            match = _CREATE_NODE.match(line)
+            if match:
+                # Shared nodes (-s) are the default cameras, not part of the control
+                currentType = None if match.group(2) else match.group(1)
+                if currentType == "nurbsCurve":
+                    curveNodes += 1
+                elif currentType == "makeNurbCircle":
+                    return None
+                continue
+            if line[:1] not in ("\t", " "):
+                # select/connectAttr/... statements end the attribute block of the last created node
+                currentType = None
+                continue
+            if currentType in ("nurbsCurve", "transform") and _SHAPE_CHANGING_ATTR.match(line):
+                return None
+            pivotMatch = _PIVOT_ATTR.match(line) if currentType == "transform" else None
+            if pivotMatch:
+                pivot = [float(value) for value in pivotMatch.groups()]
+            if currentType == "nurbsCurve" and _CURVE_ATTR.match(line):
+                tokens = line.split('"nurbsCurve"', 1)[1].replace(";", " ").split()
+                if ";" in line:
+                    curves.append(curveFromTokens(tokens))
+                    tokens = None
+    if not curves or len(curves) != curveNodes:
+        return None
+    return {"curves": curves, "pivot": pivot}
+
+def curveFromTokens(tokens):
+    """Converts the values of a nurbsCurve .cc attribute into curve data."""
+    # tokens[1] is the span count, it follows from the knots and is not needed
+    degree, form, rational, dimension = int(tokens[0]), int(tokens[2]), tokens[3] == "yes", int(tokens[4])
+    knotCount = int(tokens[5])
+    knots = [float(value) for value in tokens[6:6 + knotCount]]
+    cvCount = int(tokens[6 + knotCount])
+    stride = dimension + (1 if rational else 0)
+    values = [float(value) for value in tokens[7 + knotCount:7 + knotCount + cvCount * stride]]
+    cvs = [values[i:i + 3] if dimension == 3 else values[i:i + 2] + [0.0] for i in range(0, len(values), stride)]
+    return {"degree": degree, "form": form, "knots": knots, "cvs": cvs}
+
+def readCurvesFromMaya(path):
+    """Imports a .ma file once, reads its curves through MFnNurbsCurve and deletes the import again."""
+    importedNodes = cmds.file(path, i=True, type="mayaAscii", mergeNamespacesOnClash=False, returnNewNodes=True) or []
+    curves = []
+    pivot = [0.0, 0.0, 0.0]
+    try:
+        transforms = cmds.ls(importedNodes, type="transform", long=True) or []
+        if transforms:
+            pivot = cmds.xform(transforms[0], query=True, rotatePivot=True, objectSpace=True)
+        for shape in cmds.ls(importedNodes, type="nurbsCurve", long=True) or []:
+            selection = om2.MSelectionList()
+            selection.add(shape)
+            curveFn = om2.MFnNurbsCurve(selection.getDagPath(0))
+            curves.append({
+                "degree": curveFn.degree,
+                # MFnNurbsCurve forms are 1-based (kOpen=1), the .cc attribute is 0-based
+                "form": curveFn.form - 1,
+                "knots": list(curveFn.knots()),
+                "cvs": [[point.x, point.y, point.z] for point in curveFn.cvPositions(om2.MSpace.kObject)],
+            })
+    finally:
+        existing = cmds.ls(importedNodes, long=True) or []
+        if existing:
+            cmds.delete(existing)
+    return {"curves": curves, "pivot": pivot}
+
+def loadCacheFile(directory):
+    """Merges the on-disk cache of a scenes directory into memory, once per session."""
+    if directory in _loadedCacheFiles:
+        return
+    _loadedCacheFiles.add(directory)
+    path = cacheFilePath(directory)
+    if not os.path.exists(path):
+        return
+    try:
+        with open(path, 'r') as file:
+            entries = json.load(file)
+    except (OSError, json.JSONDecodeError):
+        print(f"Warning: Ignoring unreadable control shape cache {path}")
+        return
+    for name, entry in entries.items():
+        _shapeCache.setdefault(os.path.join(directory, name), entry)
+
+def saveCacheFile(directory):
+    """Writes the cached shapes of one scenes directory to its cache file."""
+    entries = {os.path.basename(path): entry for path, entry in _shapeCache.items() if os.path.dirname(path) == directory}
+    # Atomic, so a crash or a second Maya writing at the same time never leaves a truncated cache behind
+    writeJSONAtomic(cacheFilePath(directory), entries, indent=None)
+
+def getControlShape(path):
+    """Returns the cached shape data of a control .ma file, reading it again if the file changed."""
+    path = os.path.abspath(path)
+    directory = os.path.dirname(path)
+    loadCacheFile(directory)
+    mtime = os.path.getmtime(path)
+    entry = _shapeCache.get(path)
+    if entry is None or entry["mtime"] != mtime:
+        shapeData = parseMayaAsciiCurves(path)
+        if shapeData is None:
+            shapeData = readCurvesFromMaya(path)
+        entry = _shapeCache[path] = dict(shapeData, mtime=mtime)
+        saveCacheFile(directory)
+    return entry
+
+def buildControlCurve(path, name):
+    """Creates a control named name from the cached shapes of a .ma file. Returns the transform or None."""
+    shapeData = getControlShape(path)
+    curves = shapeData["curves"]
+    if not curves:
+        return None
+
+    transform = None
+    for curve in curves:
+        # form 2 is periodic; its CV list already repeats the first degree CVs
+        created = cmds.curve(degree=curve["degree"], point=curve["cvs"], knot=curve["knots"], periodic=curve["form"] == 2,
+                             name=name if transform is None else name + "_tmp")
+        if transform is None:
+            transform = created
+            continue
+        # Additional curves become extra shapes under the first transform
+        shape = cmds.listRelatives(created, shapes=True, fullPath=True)[0]
+        cmds.parent(shape, transform, relative=True, shape=True)
+        cmds.delete(created)
+
+    shapes = cmds.listRelatives(transform, shapes=True, fullPath=True) or []
+    for i, shape in enumerate(shapes):
+        cmds.rename(shape, transform + "Shape" + (str(i) if i else ""))
+    cmds.xform(transform, objectSpace=True, pivots=shapeData["pivot"])
+    return transform
+
+def buildShapeCache(directory, readFromMaya=False):
+    """
+    Offline converter: parses every .ma file in a scenes directory and writes the cache file.
+
+    Files that need Maya to evaluate (see parseMayaAsciiCurves) are skipped and are
+    cached the first time they are used inside Maya. With readFromMaya, run inside Maya,
+    they are imported once now instead. Returns the skipped file names.
+    """
+    directory = os.path.abspath(directory)
+    loadCacheFile(directory)
+    skipped = []
+    for fileName in sorted(os.listdir(directory)):
+        if not fileName.endswith(".ma"):
+            continue
+        path = os.path.join(directory, fileName)
+        shapeData = parseMayaAsciiCurves(path)
+        if shapeData is None and readFromMaya:
+            shapeData = readCurvesFromMaya(path)
+        if shapeData is None:
+            skipped.append(fileName)
+            continue
+        _shapeCache[path] = dict(shapeData, mtime=os.path.getmtime(path))
+    saveCacheFile(directory)
+    return skipped
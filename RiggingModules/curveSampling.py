@@ -0,0 +1,89 @@
+import maya.api.OpenMaya as om2  # type: ignore
+
+# Samples NURBS curves at points spaced evenly by arc length. The curve is read once through MFnNurbsCurve and
+# evaluated for all samples at once with NumPy; without NumPy every sample is asked from MFnNurbsCurve instead.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Dense samples per span used to build the arc length table
+SAMPLES_PER_SPAN = 64
+
+def curveData(curve, space=om2.MSpace.kWorld):
+    """Reads the degree, knot domain, full knot vector and CVs (N, 3) of a curve transform or shape."""
+    selection = om2.MSelectionList()
+    selection.add(curve)
+    curveFn = om2.MFnNurbsCurve(selection.getDagPath(0).extendToShape())
+    knots = list(curveFn.knots())
+    # Maya leaves out the first and last knot of the textbook vector, they never affect points inside the domain
+    knots = [knots[0]] + knots + [knots[-1]]
+    cvs = [[point.x, point.y, point.z] for point in curveFn.cvPositions(space)]
+    return {"degree": curveFn.degree, "domain": curveFn.knotDomain, "knots": knots, "cvs": cvs, "spans": curveFn.numSpans}
+
+def _evaluate(degree, knots, cvs, parameters):
+    # de Boor's algorithm for all parameters at once, returns an (M, 3) array
+    cvCount = len(cvs)
+    spans = np.clip(np.searchsorted(knots, parameters, side="right") - 1, degree, cvCount - 1)
+    points = np.stack([cvs[spans - degree + j] for j in range(degree + 1)], axis=1)
+    for r in range(1, degree + 1):
+        for j in range(degree, r - 1, -1):
+            left = knots[spans - degree + j]
+            right = knots[spans + 1 + j - r]
+            width = right - left
+            alpha = np.divide(parameters - left, width, out=np.zeros_like(parameters), where=width != 0)[:, None]
+            points[:, j] = (1.0 - alpha) * points[:, j - 1] + alpha * points[:, j]
+    return points[:, degree]
+
+def _derivative(degree, knots, cvs):
+    # Degree, knots and CVs of the first derivative curve
+    if degree == 0:
+        return 0, knots, np.zeros_like(cvs)
+    widths = knots[degree + 1:degree + len(cvs)] - knots[1:len(cvs)]
+    scale = np.divide(degree, widths, out=np.zeros_like(widths), where=widths != 0)[:, None]
+    return degree - 1, knots[1:-1], scale * (cvs[1:] - cvs[:-1])
+
+def sampleCurve(curve, count, space=om2.MSpace.kWorld):
+    """
+    Returns count positions and unit tangents spaced evenly by arc length along a curve, the
+    first at its start and the last at its end, as two lists of [x, y, z].
+    """
+    if count < 2:
+        raise ValueError(f"sampleCurve needs at least 2 samples, got {count}")
+    if np is None:
+        return _sampleCurveOpenMaya(curve, count, space)
+
+    data = curveData(curve, space)
+    degree = data["degree"]
+    knots = np.asarray(data["knots"], dtype=float)
+    cvs = np.asarray(data["cvs"], dtype=float)
+    start, end = data["domain"]
+
+    # Arc length table: cumulative chord length over a dense set of parameters
+    denseParameters = np.linspace(start, end, max(data["spans"] * SAMPLES_PER_SPAN, count * 4) + 1)
+    densePoints = _evaluate(degree, knots, cvs, denseParameters)
+    lengths = np.concatenate([[0.0], np.cumsum(np.linalg.norm(np.diff(densePoints, axis=0), axis=1))])
+
+    # Invert the table for evenly spaced lengths
+    parameters = np.interp(np.linspace(0.0, lengths[-1], count), lengths, denseParameters)
+    positions = _evaluate(degree, knots, cvs, parameters)
+    tangentDegree, tangentKnots, tangentCvs = _derivative(degree, knots, cvs)
+    tangents = _evaluate(tangentDegree, tangentKnots, tangentCvs, parameters)
+    norms = np.linalg.norm(tangents, axis=1)[:, None]
+    tangents = np.divide(tangents, norms, out=np.zeros_like(tangents), where=norms != 0)
+    return positions.tolist(), tangents.tolist()
+
+def _sampleCurveOpenMaya(curve, count, space):
+    # Same result without NumPy, MFnNurbsCurve finds the parameter of every length
+    selection = om2.MSelectionList()
+    selection.add(curve)
+    curveFn = om2.MFnNurbsCurve(selection.getDagPath(0).extendToShape())
+    length = curveFn.length()
+    positions, tangents = [], []
+    for i in range(count):
+        parameter = curveFn.findParamFromLength(length * i / (count - 1))
+        point = curveFn.getPointAtParam(parameter, space)
+        tangent = curveFn.tangent(parameter, space).normal()
+        positions.append([point.x, point.y, point.z])
+        tangents.append([tangent.x, tangent.y, tangent.z])
+    return positions, tangents
@@ -0,0 +1,128 @@
+import maya.cmds as cmds  # type: ignore
+import maya.api.OpenMaya as om2  # type: ignore
+
+# A module describes the joints and groups it needs and how they are parented, then creates all of it in one go.
+# The "om2" backend does the whole description with a single MDagModifier.doIt(), which is fast but never goes on
+# Maya's undo queue. The "cmds" backend replays it with cmds.joint/cmds.group/cmds.parent and stays undoable.
+
+BACKENDS = {"om2", "cmds"}
+
+class DagHierarchy(object):
+    """
+    Description of new joints and groups plus the parenting between them and existing nodes.
+
+    addJoint/addGroup return an index that can be used as a parent before build(); after
+    build() the scene names are in names (same order) and their UUIDs in uuids. Parenting
+    keeps world space like cmds.parent: new groups stay at the world origin, new joints at
+    their world position and existing nodes where they are.
+    """
+
+    def __init__(self, backend="om2"):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown DAG backend '{backend}', expected one of {sorted(BACKENDS)}")
+        self.backend = backend
+        self.nodes = []
+        self.reparents = []
+        self.names = []
+        self.uuids = []
+
+    def addJoint(self, name, position, parent=None, radius=1.0, scaleCompensate=True):
+        """Describes a joint at a world position. Returns its index."""
+        self.nodes.append({"type": "joint", "name": name, "parent": parent, "position": position,
+                           "radius": radius, "scaleCompensate": scaleCompensate})
+        return len(self.nodes) - 1
+
+    def addGroup(self, name, parent=None):
+        """Describes an empty transform at the origin. Returns its index."""
+        self.nodes.append({"type": "transform", "name": name, "parent": parent})
+        return len(self.nodes) - 1
+
+    def parent(self, child, parent):
+        """Parents a new (index) or existing (name) node under a new or existing node."""
+        self.reparents.append((child, parent))
+
+    def name(self, node):
+        """Scene name of a described node after build(), existing node names are returned unchanged."""
+        return self.names[node] if isinstance(node, int) else node
+
+    def build(self):
+        """Creates the description in the scene and returns the names of the new nodes."""
+        if self.backend == "om2":
+            self._buildOpenMaya()
+        else:
+            self._buildCmds()
+        return self.names
+
+    def _buildOpenMaya(self):
+        modifier = om2.MDagModifier()
+        created = []
+        existing = {}
+
+        def mobject(node):
+            if isinstance(node, int):
+                return created[node]
+            if node not in existing:
+                selection = om2.MSelectionList()
+                selection.add(node)
+                existing[node] = selection.getDependNode(0)
+            return existing[node]
+
+        for spec in self.nodes:
+            parent = mobject(spec["parent"]) if spec["parent"] is not None else om2.MObject.kNullObj
+            obj = modifier.createNode(spec["type"], parent)
+            modifier.renameNode(obj, spec["name"])
+            created.append(obj)
+            if spec["type"] == "joint":
+                depNode = om2.MFnDependencyNode(obj)
+                modifier.newPlugValueDouble(depNode.findPlug("radius", False), float(spec["radius"]))
+                modifier.newPlugValueBool(depNode.findPlug("segmentScaleCompensate", False), spec["scaleCompensate"])
+
+        # Existing nodes are reparented with cmds.parent afterwards, which keeps their world transform
+        existingChildren = []
+        for child, parent in self.reparents:
+            if isinstance(child, int):
+                modifier.reparentNode(mobject(child), mobject(parent))
+            else:
+                existingChildren.append((child, parent))
+
+        modifier.doIt()
+
+        # New nodes were created relative to their parents: groups are moved back to the world origin, joints to their
+        # world position. Parents go first so a child is not moved again by its parent
+        nodes = sorted(((om2.MDagPath.getAPathTo(obj), spec) for obj, spec in zip(created, self.nodes)), key=lambda node: node[0].length())
+        for path, spec in nodes:
+            transform = om2.MFnTransform(path)
+            if spec["type"] == "transform":
+                transform.setTransformation(om2.MTransformationMatrix(path.exclusiveMatrixInverse()))
+            elif spec.get("position") is not None:
+                transform.setTranslation(om2.MVector(*spec["position"]), om2.MSpace.kWorld)
+
+        self.names = [om2.MFnDagNode(obj).partialPathName() for obj in created]
+        self.uuids = [om2.MFnDependencyNode(obj).uuid().asString() for obj in created]
+
+        for child, parent in existingChildren:
+            cmds.parent(child, self.name(parent))
+
+    def _buildCmds(self):
+        self.names = []
+        for spec in self.nodes:
+            parent = self.name(spec["parent"]) if spec["parent"] is not None else None
+            if spec["type"] == "joint":
+                # cmds.joint parents the new joint under the selection
+                if parent:
+                    cmds.select(parent, replace=True)
+                else:
+                    cmds.select(clear=True)
+                name = cmds.joint(name=spec["name"], position=spec["position"], radius=spec["radius"])
+                cmds.setAttr(f"{name}.segmentScaleCompensate", spec["scaleCompensate"])
+            else:
+                name = cmds.group(empty=True, name=spec["name"])
+                if parent:
+                    name = cmds.parent(name, parent)[0]
+            self.names.append(name)
+
+        for child, parent in self.reparents:
+            renamed = cmds.parent(self.name(child), self.name(parent))[0]
+            if isinstance(child, int):
+                self.names[child] = renamed
+        self.uuids = [cmds.ls(name, uuid=True)[0] for name in self.names]
@@ -1,10 +1,114 @@
 import maya.cmds as cmds # type: ignore
+import maya.api.OpenMaya as om2  # type: ignore
 import os
-from storeObjectsInJSON import loadGeneratedObjects, cleanSpecificList, addObjectToList
+from contextlib import contextmanager
+from storeObjectsInJSON import addObjectToList, addObjectsToList, nodeRole
+from controlShapeLibrary import buildControlCurve
+from attributeBatch import AttributeBatch, setAttribute, lockAttribute
+from dagBuilder import DagHierarchy
+from transformMath import eulerToMatrices, addOffsets
+from curveSampling import sampleCurve
 import math
 
 USER_SCENE_PATH = "C:\\Users\\Asuch\\Desktop\\RiggingTool"
 
+# "om2" creates joints, groups and their parenting with one MDagModifier per hierarchy, which Maya cannot undo, "cmds"
+# uses undoable commands. "auto" picks cmds while undo is on and om2 when it is off, e.g. in fast builds
+DAG_BACKEND = "auto"
+
+# When True, templates are imported into a namespace named after their key instead of renaming every node to name_<key>
+TEMPLATE_NAMESPACES = False
+
+# "constraint" links rig parts with parent, point and orient constraints, "matrix" drives their offsetParentMatrix
+# through multMatrix and blendMatrix nodes instead, which leaves fewer nodes for Maya to evaluate
+CONNECTION_MODES = {"constraint", "matrix"}
+CONNECTION_MODE = "constraint"
+
+# When True, builds run with undo turned off, which flushes the undo queue, and are only torn down through the registry
+# (cleanSpecificList), otherwise every build is recorded as one undo chunk
+FAST_BUILD = False
+
+# Switches between renamed and namespaced template imports
+def setTemplateNamespaces(enabled):
+    global TEMPLATE_NAMESPACES
+    TEMPLATE_NAMESPACES = enabled
+
+# Switches how connect, constraintJointChains and createFKControls link nodes in every following build
+def setConnectionMode(mode):
+    global CONNECTION_MODE
+    if mode not in CONNECTION_MODES:
+        raise ValueError(f"Unknown connection mode '{mode}', expected one of {sorted(CONNECTION_MODES)}")
+    CONNECTION_MODE = mode
+
+# Uses a connection mode for the builds inside the block only, e.g. a single module. None keeps the current mode
+@contextmanager
+def connectionMode(mode):
+    previous = CONNECTION_MODE
+    if mode is not None:
+        setConnectionMode(mode)
+    try:
+        yield
+    finally:
+        setConnectionMode(previous)
+
+# Switches between undo-chunked and undo-free builds
+def setFastBuild(enabled):
+    global FAST_BUILD
+    FAST_BUILD = enabled
+
+# Wraps a build or template import so one Ctrl+Z undoes all of it, or in fast build mode turns undo off for it. Turning
+# undo off flushes the queue, older entries could not be undone over the unrecorded build anyway. While undo is on the
+# DAG, attribute and transform edits take their undoable cmds paths
+@contextmanager
+def buildUndo(name):
+    if FAST_BUILD:
+        undoState = cmds.undoInfo(query=True, state=True)
+        cmds.undoInfo(state=False)
+        try:
+            yield
+        finally:
+            cmds.undoInfo(state=undoState)
+        return
+
+    cmds.undoInfo(openChunk=True, chunkName=name)
+    try:
+        yield
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+# Starts a description of joints, groups and parenting that buildHierarchy creates in one go
+def newHierarchy():
+    backend = DAG_BACKEND
+    if backend == "auto":
+        backend = "cmds" if cmds.undoInfo(query=True, state=True) else "om2"
+    return DagHierarchy(backend)
+
+# Creates a described hierarchy and adds its new nodes to the key's list, roots are the indices of module top groups
+def buildHierarchy(hierarchy, key, roots=()):
+    names = hierarchy.build()
+    entries = {}
+    for index, (name, uuid, node) in enumerate(zip(names, hierarchy.uuids, hierarchy.nodes)):
+        entries[name] = {"uuid": uuid, "type": node["type"], "role": "root" if index in roots else nodeRole(node["type"])}
+    addObjectsToList(key, entries)
+    return names
+
+# Name of a standard module group
+def groupName(name, key):
+    return name + "_" + key + '_Grp'
+
+# Returns the scene name of a node from an imported template: "key:name" in namespace mode, "name_key" otherwise
+def templateNode(name, key):
+    if TEMPLATE_NAMESPACES:
+        return ":" + key + ":" + name
+    return name + "_" + key
+
+# Returns a template node's name in the name_key form whichever mode it was imported in, used to derive new names from it
+def templateLocalName(node, key):
+    name = node.split("|")[-1]
+    if ":" in name:
+        return name.rsplit(":", 1)[-1] + "_" + key
+    return name
+
 # Custom control colour and line width are set using next 4 functions
 def setSelectedControlsColorAndLineWidth(colorIndex, lineWidth, importedControl):
     """Set the color and line width of the imported control."""
@@ -27,127 +131,157 @@ def setSelectedControlsColorAndLineWidth(colorIndex, lineWidth, importedControl)
             set_control_color(control, colorIndex)
             set_control_line_width(control, lineWidth)
 
+# The next 3 go through the attribute batch, which keeps track of the shape even if the control is reparented before it applies
 def enable_color_override(control):
     """Enable the color override for a specific control."""
-    try:
-        cmds.setAttr(f"{control}.overrideEnabled", 1)
-    except RuntimeError as e:
-        cmds.warning(f"Failed to enable color override for {control}: {e}")
+    setAttribute(control, "overrideEnabled", True)
 
 def set_control_color(control, colorIndex):
     """Set the color override for a specific control."""
-    try:
-        cmds.setAttr(f"{control}.overrideColor", colorIndex)
-    except RuntimeError as e:
-        cmds.warning(f"Failed to set color for {control}: {e}")
+    setAttribute(control, "overrideColor", int(colorIndex))
 
 def set_control_line_width(control, lineWidth):
     """Set the line width for a specific control."""
-    try:
-        cmds.setAttr(f"{control}.lineWidth", lineWidth)
-    except RuntimeError as e:
-        cmds.warning(f"Failed to set line width for {control}: {e}")
+    setAttribute(control, "lineWidth", float(lineWidth))
 
 # Imports a control from external file given the control name
 def importer(item, name, key, scale = [1,1,1], lineWidth=1.5, colour=5):
-    """Import an external item from a file and apply a color and line width to it."""
+    """Build a control from the cached shapes of a scene file and apply a color and line width to it."""
     wholePath = os.path.join(USER_SCENE_PATH, item)
     
-    importedNodes = cmds.file(wholePath, i=True, type="mayaAscii", mergeNamespacesOnClash=False, returnNewNodes=True)
-
-    # Find the first transform node in the imported nodes
-    importedTransform = next((node for node in importedNodes if cmds.objectType(node) == "transform"), None)
+    # The curves are read from the .ma file once and rebuilt from the shape cache afterwards
+    renamedItem = buildControlCurve(wholePath, name)
 
-    if not importedTransform:
-        cmds.warning("No transform node found in the imported file.")
+    if not renamedItem:
+        cmds.warning("No curves found in the imported file.")
         return None
 
-    renamedItem = cmds.rename(importedTransform, name)
-
     # Apply color and line width settings to the imported control
     setSelectedControlsColorAndLineWidth(colour, lineWidth, renamedItem)
     cmds.scale(scale[0], scale[1], scale[2], renamedItem)
 
-    addObjectToList(key, renamedItem)
+    addObjectToList(key, renamedItem, "transform")
     
     return renamedItem
 
 # Creates an offset group for a given item
 def createOffsetGrp(item, key):
-    offsetGroup = cmds.group(empty=True, name=item + '_OffsetGrp')
-    cmds.parent(item, offsetGroup)
-
-    # Zero out the group's transformations to match the control's current transform and pivots
-    cmds.setAttr(offsetGroup + ".translate", 0, 0, 0)
-    cmds.setAttr(offsetGroup + ".rotate", 0, 0, 0)
-    cmds.setAttr(offsetGroup + ".scale", 1, 1, 1)
+    hierarchy = newHierarchy()
+    offsetGroup = hierarchy.addGroup(item + '_OffsetGrp')
+    hierarchy.parent(item, offsetGroup)
+    offsetGroup = buildHierarchy(hierarchy, key)[0]
+
+    # Zero out the group's transformations to match the control's current transform and pivots.
+    # Applied right away in one modifier, the offset group is moved later in the build
+    zeroOut = AttributeBatch()
+    for axis in "XYZ":
+        zeroOut.set(offsetGroup, "translate" + axis, 0.0)
+        zeroOut.set(offsetGroup, "rotate" + axis, 0.0)
+        zeroOut.set(offsetGroup, "scale" + axis, 1.0)
+    zeroOut.apply()
     control_pivot_translation = cmds.xform(item, query=True, rotatePivot=True, worldSpace=True)
     cmds.xform(offsetGroup, worldSpace=True, pivots=control_pivot_translation)
-    addObjectToList(key, offsetGroup)
 
     return offsetGroup
 
-# Creates a standard group for a given item
-def createGroup(name, key):
-    group = cmds.group(empty=True, name=name + "_" + key + '_Grp')
-    addObjectToList(key, group)
+# Creates a standard group for a given item, root marks the top group of a module for teardown
+def createGroup(name, key, root=False):
+    hierarchy = newHierarchy()
+    hierarchy.addGroup(groupName(name, key))
+    group = buildHierarchy(hierarchy, key, roots=[0] if root else ())[0]
 
     return group
 
 # Matches the transforms of the source to the target with an optional offset
 def matchTransform(source, target, transOffset=[0, 0, 0], rotOffset=[0,0,0]):
-    targetPos = cmds.xform(target, query=True, worldSpace=True, translation=True)
-    targetRot = cmds.xform(target, query=True, worldSpace=True, rotation=True)
-    
-    # Apply the offset
-    newPos = [targetPos[0] + transOffset[0], targetPos[1] + transOffset[1], targetPos[2] + transOffset[2]]
-    newRot = [targetRot[0] + rotOffset[0], targetRot[1] + rotOffset[1], targetRot[2] + rotOffset[2]]
+    matchTransforms([(source, target)], [(transOffset, rotOffset)])
 
-    cmds.xform(source, worldSpace=True, translation=newPos, rotation=newRot)
-    cmds.makeIdentity(source, apply=True, translate=True, rotate=True, scale=True, normal=False)
+# Matches the transforms of many (source, target) pairs, offsets holds a (transOffset, rotOffset) per pair.
+# Every target is read before any source moves, then all sources are frozen with one makeIdentity
+def matchTransforms(pairs, offsets=None):
+    if not pairs:
+        return
+    offsets = offsets or [([0, 0, 0], [0, 0, 0])] * len(pairs)
+    paths = {}
+    for node in {node for pair in pairs for node in pair}:
+        selection = om2.MSelectionList()
+        selection.add(node)
+        paths[node] = selection.getDagPath(0)
+
+    # Read the world translation and rotation of every target, the rotation in the target's rotate order like xform returns it
+    targetPos = []
+    targetRot = []
+    for source, target in pairs:
+        worldMatrix = om2.MTransformationMatrix(paths[target].inclusiveMatrix())
+        translation = worldMatrix.translation(om2.MSpace.kWorld)
+        targetPos.append([translation.x, translation.y, translation.z])
+        targetOrder = om2.MFnTransform(paths[target]).rotation().order
+        rotation = worldMatrix.rotation().reorder(targetOrder)
+        targetRot.append([math.degrees(rotation.x), math.degrees(rotation.y), math.degrees(rotation.z)])
+
+    # Apply the offsets
+    newPos = addOffsets(targetPos, [transOffset for transOffset, rotOffset in offsets])
+    newRot = addOffsets(targetRot, [rotOffset for transOffset, rotOffset in offsets])
+
+    # The rotation values are applied in the source's rotate order, as xform does. MFnTransform edits are not
+    # undoable, so while undo is on they go through xform
+    undoable = cmds.undoInfo(query=True, state=True)
+    for (source, target), position, rotation in zip(pairs, newPos, newRot):
+        if undoable:
+            cmds.xform(paths[source].fullPathName(), worldSpace=True, translation=position, rotation=rotation)
+            continue
+        transform = om2.MFnTransform(paths[source])
+        sourceOrder = transform.rotation().order
+        transform.setTranslation(om2.MVector(*position), om2.MSpace.kWorld)
+        radians = [math.radians(angle) for angle in rotation]
+        transform.setRotation(om2.MEulerRotation(radians[0], radians[1], radians[2], sourceOrder), om2.MSpace.kWorld)
+
+    sources = list(dict.fromkeys(source for source, target in pairs))
+    cmds.makeIdentity(sources, apply=True, translate=True, rotate=True, scale=True, normal=False)
 
 # Imports the rigging module templates and cleans stuff up, like parenting etc
 def templateImporter(item, key):
-    newNodes = []
     wholePath = os.path.join(USER_SCENE_PATH, item)
 
-    # Get all top-level nodes before import
-    beforeTopNodes = set(cmds.ls(assemblies=True))
-
-    # Get all nodes before import (for renaming purposes)
-    beforeAllNodes = set(cmds.ls(l=True))
-
-    # Import the file
-    cmds.file(wholePath, i=True, type="mayaAscii", mergeNamespacesOnClash=False)
-
-    # Get top-level nodes after import to find new group(s)
-    afterTopNodes = set(cmds.ls(assemblies=True))
-    importedGroups = list(afterTopNodes - beforeTopNodes)
+    # Import the file and work only on the nodes it created, never on the whole scene
+    namespaceFlags = {"namespace": key} if TEMPLATE_NAMESPACES else {}
+    importedNodes = cmds.file(wholePath, i=True, type="mayaAscii", mergeNamespacesOnClash=False, returnNewNodes=True, **namespaceFlags) or []
+    # Both queries list the same nodes in the same order
+    importedPaths = cmds.ls(importedNodes, long=True) or []
+    importedUuids = cmds.ls(importedNodes, uuid=True) or []
+
+    # The imported top-level group is the imported DAG node directly under the world
+    importedGroup = next((path for path in importedPaths if path.count("|") == 1), None)
+
+    if TEMPLATE_NAMESPACES:
+        # The namespace already keeps the names unique, nothing has to be renamed
+        renamed = {uuid: path.split('|')[-1] for path, uuid in zip(importedPaths, importedUuids)}
+    else:
+        # Rename imported nodes, deepest paths first so the paths of the remaining ones stay valid
+        renamed = {}
+        for path, uuid in sorted(zip(importedPaths, importedUuids), key=lambda pair: pair[0].count("|"), reverse=True):
+            node = path.split('|')[-1]
+            try:
+                renamed[uuid] = cmds.rename(path, node + "_" + key)
+            except Exception:
+                pass
 
     # Parent the imported top-level group to RIG_TEMP_GRP_ALL
-    if importedGroups:
-        importedGroup = importedGroups[0]  # assuming only one
+    if importedGroup:
+        groupUuid = importedUuids[importedPaths.index(importedGroup)]
         try:
-            cmds.parent(importedGroup, "RIG_TEMP_GRP_ALL")
+            cmds.parent(renamed.get(groupUuid, importedGroup), "RIG_TEMP_GRP_ALL")
         except Exception as e:
             print(f"Could not parent {importedGroup} to RIG_TEMP_GRP_ALL: {e}")
 
-    # Get all nodes after import
-    afterAllNodes = set(cmds.ls(l=True))
-    importedNodes = list(afterAllNodes - beforeAllNodes)
-
-    # Rename imported nodes
-    for fullNode in importedNodes:
-        node = fullNode.split('|')[-1]
-        newName = node + "_" + key
-        try:
-            renamed = cmds.rename(node, newName)
-            addObjectToList(key, renamed)
-            newNodes.append(renamed)
-        except Exception:
-            pass
+    # Register everything in import order with the UUIDs already queried above
+    newNodes = {}
+    for path, uuid in zip(importedPaths, importedUuids):
+        if uuid in renamed:
+            newNodes[renamed[uuid]] = {"uuid": uuid, "role": "root" if path == importedGroup else None}
+    addObjectsToList(key, newNodes)
 
-    return newNodes
+    return list(newNodes)
 
 
 def scaleCompensate(joints):
@@ -156,19 +290,43 @@ def scaleCompensate(joints):
 
 # Creates joints given a list of locators and a list of joint names. 
 def createJoints(locators, jointNames, locatorPositions, joints, key, radius = 1, parent=True):
-    cmds.select(clear=True)
-    for loc, jnt in zip(locators, jointNames):
-        pos = cmds.xform(loc, query=True, worldSpace=True, translation=True)
-        locatorPositions[loc] = pos
-        if parent == False:
-            cmds.select(clear=True)
-        jntCreated = cmds.joint(name=jnt, position=pos, radius=radius)
-        joints.append(jntCreated)
-        addObjectToList(key, jntCreated)
-
-    scaleCompensate(joints)
+    joints.extend(createJointChains(locators, {"joints": jointNames}, locatorPositions, key, radius, parent)["joints"])
     return joints, locatorPositions
 
+# Reads the world positions of locators, each one once
+def locatorWorldPositions(locators):
+    positions = {}
+    for loc in locators:
+        if loc not in positions:
+            selection = om2.MSelectionList()
+            selection.add(loc)
+            translation = om2.MFnTransform(selection.getDagPath(0)).translation(om2.MSpace.kWorld)
+            positions[loc] = [translation.x, translation.y, translation.z]
+    return positions
+
+# Creates several joint chains over the same locators, e.g. IK, FK and ENV, reading every locator once.
+# chains maps a chain name to its joint names (one per locator) or to (locators, jointNames) for a different
+# set of locators. All chains are created in one hierarchy build and registered together.
+# Returns {chain name: joints}
+def createJointChains(locators, chains, locatorPositions, key, radius = 1, parent=True):
+    chainLocators = {name: spec[0] if isinstance(spec, tuple) else locators for name, spec in chains.items()}
+    positions = locatorWorldPositions([loc for chainLocs in chainLocators.values() for loc in chainLocs])
+    locatorPositions.update(positions)
+
+    hierarchy = newHierarchy()
+    chainIndices = {}
+    for name, spec in chains.items():
+        jointNames = spec[1] if isinstance(spec, tuple) else spec
+        previous = None
+        chainIndices[name] = []
+        for loc, jnt in zip(chainLocators[name], jointNames):
+            # Each joint is a child of the previous one unless parent is False
+            previous = hierarchy.addJoint(jnt, positions[loc], parent=previous if parent else None, radius=radius, scaleCompensate=False)
+            chainIndices[name].append(previous)
+
+    names = buildHierarchy(hierarchy, key)
+    return {name: [names[index] for index in indices] for name, indices in chainIndices.items()}
+
 # Creates point and orient contraints between two joint chains e.g when creating ik-fk switching
 def constraintJointChains(rootJntOne, rootJntTwo, key):
     # Get all joints in both hierarchies
@@ -179,12 +337,54 @@ def constraintJointChains(rootJntOne, rootJntTwo, key):
     joints1 = [rootJntOne] + joints1 if joints1 else [rootJntOne]
     joints2 = [rootJntTwo] + joints2 if joints2 else [rootJntTwo]
     
+    # Matrix mode: each joint gets a multMatrix, a second driver chain is blended in with a blendMatrix
+    if CONNECTION_MODE == "matrix":
+        for j1, j2 in zip(joints1, joints2):
+            addMatrixDriver(j1, j2, key)
+        return
+
     # Add point and orient constraints with maintain offset
     for j1, j2 in zip(joints1, joints2):
         pointConstraint = cmds.pointConstraint(j1, j2, maintainOffset=True)[0]
         orientConstraint = cmds.orientConstraint(j1, j2, maintainOffset=True)[0]
-        addObjectToList(key, pointConstraint)
-        addObjectToList(key, orientConstraint)
+        addObjectToList(key, pointConstraint, "pointConstraint")
+        addObjectToList(key, orientConstraint, "orientConstraint")
+
+# Constrains a driven chain, e.g. ENV, to one or more driver chains, e.g. IK and FK, in one pass: one point and one
+# orient constraint per joint with every driver as a target, or in matrix mode one multMatrix per driver blended by a
+# blendMatrix. The chains are lists of joints in the same order. Returns the weight plugs for setupIKFKSwitch, per
+# driven joint a list with the plugs of each driver (empty for the blendMatrix input, which has no weight of its own).
+# A single driver chain has nothing to switch between and returns None in both modes
+def constraintDriverChains(driverChains, drivenChain, key):
+    weights = []
+    for i, drivenJoint in enumerate(drivenChain):
+        drivers = [chain[i] for chain in driverChains]
+
+        if CONNECTION_MODE == "matrix":
+            multMatrices = [matrixDriver(driver, drivenJoint, key) for driver in drivers]
+            if len(multMatrices) == 1:
+                cmds.connectAttr(multMatrices[0] + ".matrixSum", drivenJoint + ".offsetParentMatrix", force=True)
+                continue
+            blendMatrix = cmds.createNode("blendMatrix", name=f"blendMatrix_{drivenJoint}_" + key, skipSelect=True)
+            addObjectToList(key, blendMatrix, "blendMatrix")
+            cmds.connectAttr(multMatrices[0] + ".matrixSum", blendMatrix + ".inputMatrix")
+            jointWeights = [[]]
+            for target, multMatrix in enumerate(multMatrices[1:]):
+                cmds.connectAttr(multMatrix + ".matrixSum", f"{blendMatrix}.target[{target}].targetMatrix")
+                jointWeights.append([f"{blendMatrix}.target[{target}].weight"])
+            cmds.connectAttr(blendMatrix + ".outputMatrix", drivenJoint + ".offsetParentMatrix", force=True)
+            weights.append(jointWeights)
+            continue
+
+        pointConstraint = cmds.pointConstraint(*drivers, drivenJoint, maintainOffset=True)[0]
+        orientConstraint = cmds.orientConstraint(*drivers, drivenJoint, maintainOffset=True)[0]
+        addObjectToList(key, pointConstraint, "pointConstraint")
+        addObjectToList(key, orientConstraint, "orientConstraint")
+
+        # Constraint weights are aliased <target>W<target index>
+        weights.append([[f"{constraint}.{driver.rsplit('|', 1)[-1]}W{index}" for constraint in (pointConstraint, orientConstraint)]
+                        for index, driver in enumerate(drivers)])
+    return weights if len(driverChains) > 1 else None
 
 # Create FK control for each fk joint given a control name to import and an fk joint chain
 def createFKControls(fkChain, control, key, transOffset=[0,0,0], rotOffset=[0,0,0], scaleOffset=[1,1,1], parent=True, offsetGrp=True, colour=18):
@@ -192,15 +392,19 @@ def createFKControls(fkChain, control, key, transOffset=[0,0,0], rotOffset=[0,0,
     previousControl = None
     fkControls = []
     fkControlOffsetGrps = []
-    
+
+    # Create every control first so the whole chain can be aligned and pushed to the offset matrices in one go
     for i, joint in enumerate(fkChain):
         base_name = fkChain[i].removesuffix('_JNT')  # Removes "_JNT" if it exists
         controlName = base_name + '_CTRL'
         
         fkControl = importer(item=control, name=controlName, scale=scaleOffset, key=key, colour=colour)
-        matchTransform(source=fkControl, target=fkChain[i])
+        fkControls.append(fkControl)
+
+    matchTransforms(list(zip(fkControls, fkChain)))
+    pushRotToOffsetMats(items=fkControls)
 
-        pushRotToOffsetMat(item=fkControl)
+    for i, fkControl in enumerate(fkControls):
         if offsetGrp == True:
             fkControlOffsetGrp = createOffsetGrp(item=fkControl, key=key)
             fkControlOffsetGrps.append(fkControlOffsetGrp)
@@ -217,9 +421,7 @@ def createFKControls(fkChain, control, key, transOffset=[0,0,0], rotOffset=[0,0,
         
         previousControl=fkControl
         
-        parentConstraint = cmds.parentConstraint(fkControl, fkChain[i], maintainOffset=True)[0]
-        addObjectToList(key, parentConstraint)
-        fkControls.append(fkControl)
+        connect(fkControl, fkChain[i], key)
         lockAttributes(item=fkControl, scale = 1, hidden = 1)
 
     return fkControls, fkControlOffsetGrps
@@ -250,74 +452,105 @@ def euler_to_matrix(rotation):
 
 # Push rotate values to parent offset matrix of chosen item
 def pushRotToOffsetMat(item): 
-    obj = item
-    
-    # Get the rotation values of the object and multiply by -1
-    rotation = [-val for val in cmds.getAttr(obj + '.rotate')[0]]
-    
-    # Convert the rotation values to a matrix
-    rotation_matrix = euler_to_matrix(rotation)
-    
-    # Get the current parent offset matrix
-    offset_matrix = cmds.getAttr(obj + '.offsetParentMatrix')
-    
-    # Create a new offset matrix with the rotation values
-    new_matrix = list(offset_matrix)
-    
-    for i in range(3):
-        for j in range(3):
-            new_matrix[i*4 + j] = rotation_matrix[i][j]
-    
-    # Set the new offset matrix
-    cmds.setAttr(obj + '.offsetParentMatrix', *new_matrix, type='matrix')
-    
-    # Freeze transformations
-    cmds.makeIdentity(obj, apply=True, rotate=True)
+    pushRotToOffsetMats([item])
+
+# Push the rotate values of several items to their parent offset matrices: one query pass, one write and one freeze
+def pushRotToOffsetMats(items):
+    if not items:
+        return
+
+    selection = om2.MSelectionList()
+    for item in items:
+        selection.add(item)
+
+    # Get the rotation values and rotate orders of the objects, multiplied by -1, and their current parent offset matrices
+    rotations = []
+    rotateOrders = []
+    offsetPlugs = []
+    offsetMatrices = []
+    for i in range(len(items)):
+        transform = om2.MFnTransform(selection.getDagPath(i))
+        euler = transform.rotation(om2.MSpace.kTransform)
+        rotations.append([-euler.x, -euler.y, -euler.z])
+        rotateOrders.append(euler.order)
+        plug = transform.findPlug("offsetParentMatrix", False)
+        offsetMatrix = om2.MFnMatrixData(plug.asMObject()).matrix()
+        offsetPlugs.append(plug)
+        offsetMatrices.append([offsetMatrix.getElement(row, column) for row in range(4) for column in range(4)])
+
+    # Convert all rotations to matrices at once
+    rotationMatrices = eulerToMatrices(rotations, rotateOrders, degrees=False)
+
+    # Replace the rotation part of each offset matrix and write them all with one modifier, or with undoable
+    # cmds.setAttr calls while undo is on
+    undoable = cmds.undoInfo(query=True, state=True)
+    modifier = om2.MDGModifier()
+    for item, plug, offsetMatrix, rotationMatrix in zip(items, offsetPlugs, offsetMatrices, rotationMatrices):
+        new_matrix = list(offsetMatrix)
+        for i in range(3):
+            for j in range(3):
+                new_matrix[i*4 + j] = float(rotationMatrix[i][j])
+        if undoable:
+            cmds.setAttr(item + ".offsetParentMatrix", *new_matrix, type="matrix")
+        else:
+            modifier.newPlugValue(plug, om2.MFnMatrixData().create(om2.MMatrix(new_matrix)))
+    if not undoable:
+        modifier.doIt()
 
-# Sets up the IK-FK switching of chosen fk and ik chains
-def setupIKFKSwitch(envChain, fkChain, ikChain, switchCtrl, key):
+    # Freeze transformations
+    cmds.makeIdentity(items, apply=True, rotate=True)
+
+# Returns the reverse node of a switch control's IKFK attribute, shared by every IK weight and visibility it drives
+def switchReverse(switchCtrl, key):
+    reverseNodes = cmds.listConnections(switchCtrl + ".IKFK", source=False, destination=True, type="reverse") or []
+    if reverseNodes:
+        return reverseNodes[0]
+    reverseNode = cmds.shadingNode("reverse", asUtility=True, name=f"reverse_{switchCtrl}_IKFK_" + key)
+    addObjectToList(key, reverseNode, "reverse")
+    cmds.connectAttr(switchCtrl + ".IKFK", reverseNode + ".inputX", force=True)
+    return reverseNode
+
+# Sets up the IK-FK switching of chosen fk and ik chains. weights are the plugs returned by constraintDriverChains for
+# [ikChain, fkChain], without them the constraints or blendMatrix nodes are looked up on the env joints
+def setupIKFKSwitch(envChain, fkChain, ikChain, switchCtrl, key, weights=None):
     # Add the IK/FK switching attribute if it doesn't exist
     if not cmds.attributeQuery('IKFK', node=switchCtrl, exists=True):
         cmds.addAttr(switchCtrl, longName='IKFK', attributeType='float', min=0, max=1, defaultValue=0)
         cmds.setAttr(switchCtrl + ".IKFK", keyable=True)
 
+    # The FK weights follow IKFK directly and the IK weights its one shared reverse
+    reverseNode = None
+
+    if weights is not None:
+        for ikWeights, fkWeights in weights:
+            if ikWeights and reverseNode is None:
+                reverseNode = switchReverse(switchCtrl, key)
+            for plug in ikWeights:
+                cmds.connectAttr(reverseNode + ".outputX", plug, force=True)
+            for plug in fkWeights:
+                cmds.connectAttr(switchCtrl + ".IKFK", plug, force=True)
+        return
+
     # Loop through the envChain, ikChain, and fkChain
     for i, envJoint in enumerate(envChain):
         ikJoint = ikChain[i]
         fkJoint = fkChain[i]
 
+        # Matrix mode: the blendMatrix goes from the IK matrix to the FK one as IKFK goes from 0 to 1
+        blendMatrices = cmds.listConnections(envJoint + ".offsetParentMatrix", source=True, destination=False, type="blendMatrix") or []
+        for blendMatrix in blendMatrices:
+            cmds.connectAttr(switchCtrl + ".IKFK", blendMatrix + ".target[0].weight", force=True)
+
         # Find the constraints on the env joint
         constraints = cmds.listRelatives(envJoint, type=["pointConstraint", "orientConstraint"]) or []
 
         for constraint in constraints:
-            # Determine if it's a point or orient constraint
-            constraintType = cmds.nodeType(constraint)
-
-            # Get the weight attributes for the IK and FK
-            ikWeightAttr = f"{constraint}.{ikJoint}W0"
-            fkWeightAttr = f"{constraint}.{fkJoint}W1"
-
-            # Create a blendColors node and a reverse node
-            blendNode = cmds.shadingNode('blendColors', asUtility=True, name=f"blendColors_{envJoint}_{constraintType}" + "_" + key)
-            reverseNode = cmds.shadingNode('reverse', asUtility=True, name=f"reverse_{envJoint}_{constraintType}" + "_" + key)
-            addObjectToList(key, blendNode)
-            addObjectToList(key, reverseNode)
-
-            # Set color1R to 1 and color2R to 0 in the blendColors node
-            cmds.setAttr(blendNode + ".color1R", 1)
-            cmds.setAttr(blendNode + ".color2R", 0)
-
-            # Connect the IKFK switch attribute to the blend attribute of the blendColors node
-            cmds.connectAttr(switchCtrl + ".IKFK", blendNode + ".blender", force=True)
-
-            # Connect outputR from blendColors node to inputX of reverse node
-            cmds.connectAttr(blendNode + ".outputR", reverseNode + ".inputX", force=True)
+            if reverseNode is None:
+                reverseNode = switchReverse(switchCtrl, key)
 
-            # Connect outputX from reverse node to the IK weight attribute
-            cmds.connectAttr(reverseNode + ".outputX", ikWeightAttr, force=True)
-
-            # Connect outputR from blendColors node to the FK weight attribute
-            cmds.connectAttr(blendNode + ".outputR", fkWeightAttr, force=True)
+            # Connect the IK weight to the reverse and the FK weight to the switch attribute
+            cmds.connectAttr(reverseNode + ".outputX", f"{constraint}.{ikJoint}W0", force=True)
+            cmds.connectAttr(switchCtrl + ".IKFK", f"{constraint}.{fkJoint}W1", force=True)
 
 # Takes the setup IK-FK switching module and setus up visibility of controls for clarity
 def setupIKFKVisibility(fkControls, ikControls, switchCtrl, key):
@@ -325,125 +558,87 @@ def setupIKFKVisibility(fkControls, ikControls, switchCtrl, key):
     for fkCtrl in fkControls:
         cmds.connectAttr(switchCtrl + ".IKFK", fkCtrl + ".visibility", force=True)
 
-    # Loop through IK controls, create a reverse node, and connect it
-    for ikCtrl in ikControls:
-        reverseNode = cmds.shadingNode("reverse", asUtility=True, name=f"reverse_{ikCtrl}_vis_" + key)
-        addObjectToList(key, reverseNode)
-
-        cmds.connectAttr(switchCtrl + ".IKFK", reverseNode + ".inputX", force=True)
-        cmds.connectAttr(reverseNode + ".outputX", ikCtrl + ".visibility", force=True)
+    # IK controls share the reverse node of the switch
+    if ikControls:
+        reverseNode = switchReverse(switchCtrl, key)
+        for ikCtrl in ikControls:
+            cmds.connectAttr(reverseNode + ".outputX", ikCtrl + ".visibility", force=True)
 
 # Locks chosen attributes on specified item
 def lockAttributes(item, trans = 0, rot = 0, scale = 0, vis = 0, hidden = 0):
+    # Queued on the attribute batch of the current build, see attributeBatch.py
+    channels = []
     if trans > 0:
-        cmds.setAttr(f"{item}.translateX", lock=True, keyable=False)
-        cmds.setAttr(f"{item}.translateY", lock=True, keyable=False)
-        cmds.setAttr(f"{item}.translateZ", lock=True, keyable=False)
-        if hidden > 0:
-            cmds.setAttr(f"{item}.translateX", channelBox=False)
-            cmds.setAttr(f"{item}.translateY", channelBox=False)
-            cmds.setAttr(f"{item}.translateZ", channelBox=False)
-
+        channels += ["translateX", "translateY", "translateZ"]
     if rot > 0:
-        cmds.setAttr(f"{item}.rotateX", lock=True, keyable=False)
-        cmds.setAttr(f"{item}.rotateY", lock=True, keyable=False)
-        cmds.setAttr(f"{item}.rotateZ", lock=True, keyable=False)
-        if hidden > 0:
-            cmds.setAttr(f"{item}.rotateX", channelBox=False)
-            cmds.setAttr(f"{item}.rotateY", channelBox=False)
-            cmds.setAttr(f"{item}.rotateZ", channelBox=False)
-
+        channels += ["rotateX", "rotateY", "rotateZ"]
     if scale > 0:
-        cmds.setAttr(f"{item}.scaleX", lock=True, keyable=False)
-        cmds.setAttr(f"{item}.scaleY", lock=True, keyable=False)
-        cmds.setAttr(f"{item}.scaleZ", lock=True, keyable=False)
-        if hidden > 0:
-            cmds.setAttr(f"{item}.scaleX", channelBox=False)
-            cmds.setAttr(f"{item}.scaleY", channelBox=False)
-            cmds.setAttr(f"{item}.scaleZ", channelBox=False)
-
+        channels += ["scaleX", "scaleY", "scaleZ"]
     if vis > 0:
-        cmds.setAttr(f"{item}.visibility", lock=True, keyable=False)
-        if hidden > 0:
-            cmds.setAttr(f"{item}.visibility", channelBox=False)
+        channels.append("visibility")
+
+    for channel in channels:
+        lockAttribute(item, channel, hide=hidden > 0)
 
 # Inserts evenly a given amount of joints between two joints given a root joint
 def subdivideJointChain(tmpStartEndJoints, jointSubdiv, key, name="spine", nameFirstJoint="pelvis"):
-    rootJointCopy = cmds.duplicate(tmpStartEndJoints, rc=True)
-
-    rootJointCopy[0] = cmds.rename(rootJointCopy[0], "startJoint001_"+ key)
-    rootJointCopy[1] = cmds.rename(rootJointCopy[1], "endJoint001_" + key)
-    
-    rootJoint = rootJointCopy
-    joint_chain = cmds.listRelatives(rootJoint[0], allDescendents=True, type='joint')
-    joint_chain.append(rootJoint[0])
-    joint_chain.reverse()
-
-    new_joints = []
-
-    start_joint = rootJoint[0]
-    end_joint = rootJoint[1]
+    # Get the world space positions of the start and end joints
+    start_pos = cmds.xform(tmpStartEndJoints[0], query=True, worldSpace=True, translation=True)
+    end_pos = cmds.xform(tmpStartEndJoints[1], query=True, worldSpace=True, translation=True)
 
-    # Rename the first joint to "pelvis_JNT"
-    pelvis_joint = cmds.rename(start_joint, nameFirstJoint +  "_" + key + "_JNT")
-    new_joints.append(pelvis_joint)
-    addObjectToList(key, pelvis_joint)
+    hierarchy = newHierarchy()
 
-    # Get the world space positions of the start and end joints
-    start_pos = cmds.xform(pelvis_joint, query=True, worldSpace=True, translation=True)
-    end_pos = cmds.xform(end_joint, query=True, worldSpace=True, translation=True)
-    cmds.select(pelvis_joint)
+    # The first joint sits on the start joint, e.g. "pelvis_JNT"
+    previous = hierarchy.addJoint(nameFirstJoint + "_" + key + "_JNT", start_pos, scaleCompensate=False)
 
     # Calculate the positions for the new joints
     for j in range(1, jointSubdiv + 1):
         t = j / (jointSubdiv + 1)
         new_pos = [(1 - t) * start_pos[k] + t * end_pos[k] for k in range(3)]
+        previous = hierarchy.addJoint(name + "_" + key + f"_0{j}_JNT", new_pos, parent=previous, scaleCompensate=False)
 
-        # Create a new joint at the calculated position
-        new_joint = cmds.joint(position=new_pos)
-        # Rename the new joint to "spine_0x_JNT"
-        renamedJoint = cmds.rename(new_joint, name + "_" + key + f"_0{j}_JNT")
-        new_joints.append(renamedJoint)
-        addObjectToList(key, renamedJoint)
-
-    # Reparent the end joint to the last new joint
-    cmds.parent(end_joint, new_joints[-1])
-
-    # Rename the last joint (previously endJoint) to "spine_0(x+1)_JNT"
+    # The last joint "spine_0(x+1)_JNT" sits on the end joint
     last_index = jointSubdiv + 1
-    lastJoint = cmds.rename(end_joint, name + "_" + key + f"_0{last_index}_JNT")
-    new_joints.append(lastJoint)
-    scaleCompensate(new_joints)
-    addObjectToList(key, lastJoint)
+    hierarchy.addJoint(name + "_" + key + f"_0{last_index}_JNT", end_pos, parent=previous, scaleCompensate=False)
 
-    return new_joints
+    return buildHierarchy(hierarchy, key)
 
-# Snaps given joint chain to a curve
+# Snaps given joint chain to a curve, spaced evenly by arc length. The root joint stays where it is
 def snapJointsToCurve(jointChain, curve, key):
-    # Get the total length of the curve
-    curve_length = cmds.arclen(curve)
-    
-    # Calculate the step size, which is the distance between each joint along the curve
-    step = curve_length / (float(len(jointChain))-1)
-    jointNum = len(jointChain)
-
-    # Snap each joint to the curve, spaced evenly
-    for i in range(1, jointNum):
-        joint = jointChain[i]
-        param = step * i / curve_length
-        # Get the position of the joint at the calculated parameter
-        position = cmds.pointOnCurve(curve, parameter=param, position=True)
+    positions = sampleCurve(curve, len(jointChain))[0]
+    for joint, position in zip(jointChain[1:], positions[1:]):
         cmds.xform(joint, worldSpace=True, translation=position)
 
         # Add the joint to the key tracking list
-        addObjectToList(key, joint)
+        addObjectToList(key, joint, "joint")
+
+# Creates joint chains along a curve, e.g. the IK, FK and ENV chains of a spine, with jointSubdiv joints between the
+# first and the last joint. The first joint sits at startPosition and the others are spaced evenly by arc length up to
+# the curve end. The curve is sampled once, the joints are created in place with their final names in one hierarchy
+# build and registered together.
+# chains maps a chain name to (name, nameFirstJoint). Returns {chain name: joints}
+def createCurveJointChains(curve, startPosition, jointSubdiv, chains, key):
+    positions = [list(startPosition)] + sampleCurve(curve, jointSubdiv + 2)[0][1:]
+
+    hierarchy = newHierarchy()
+    chainIndices = {}
+    for chainName, (name, nameFirstJoint) in chains.items():
+        jointNames = [nameFirstJoint + "_" + key + "_JNT"] + [name + "_" + key + f"_0{j}_JNT" for j in range(1, jointSubdiv + 2)]
+        previous = None
+        chainIndices[chainName] = []
+        for jointName, position in zip(jointNames, positions):
+            previous = hierarchy.addJoint(jointName, position, parent=previous, scaleCompensate=False)
+            chainIndices[chainName].append(previous)
+
+    names = buildHierarchy(hierarchy, key)
+    return {chainName: [names[index] for index in indices] for chainName, indices in chainIndices.items()}
 
 # Set up twist nodes given ik handle and controls
 def addTwistToSpline(controls, ikHandle, key):
     multiplyNode = cmds.shadingNode("multiplyDivide", asUtility=True, name=f"multiplyDivide" + key)
     plusMinAvgNode = cmds.shadingNode("plusMinusAverage", asUtility=True, name=f"plusMinusAverage" + key)
-    addObjectToList(key, multiplyNode)
-    addObjectToList(key, plusMinAvgNode)
+    addObjectToList(key, multiplyNode, "multiplyDivide")
+    addObjectToList(key, plusMinAvgNode, "plusMinusAverage")
 
     cmds.setAttr(multiplyNode + ".input2X", -1)
 
@@ -463,10 +658,11 @@ def addTwistToSpline(controls, ikHandle, key):
         cmds.connectAttr(rotate_attr, input_attr, force=True)
 
 # Creates splineIK given control joints, joint chain, and curve
-def createSplineIK(controlJoints, jointChain, curveIK, key):
+def createSplineIK(controlJoints, jointChain, curveIK, key, templateKey):
     # Duplicate the curve so the original remains unchanged
-    duplicatedCurve = cmds.duplicate(curveIK, name=curveIK + "_IK_" + key)[0]
-    addObjectToList(key, duplicatedCurve)
+    # The duplicate belongs to the rig and gets the same name whichever mode the template curve was imported in
+    duplicatedCurve = cmds.duplicate(curveIK, name=templateLocalName(curveIK, templateKey) + "_IK_" + key)[0]
+    addObjectToList(key, duplicatedCurve, "transform")
     # Create the spline IK handle
     ikHandle = cmds.ikHandle(
         name=jointChain[0] + "_splineIK_" + key,
@@ -479,19 +675,74 @@ def createSplineIK(controlJoints, jointChain, curveIK, key):
     # Bind the duplicated curve to the control joints
     cmds.select(controlJoints, duplicatedCurve)
     splineIKSpineSkinCluster = cmds.skinCluster(tsb=True, name=duplicatedCurve + "_skinCluster_" + key)[0]
-    addObjectToList(key, splineIKSpineSkinCluster)
+    addObjectToList(key, splineIKSpineSkinCluster, "skinCluster")
 
     return ikHandle, duplicatedCurve
 
 
-# Creates a parent connection between the out and in
+# Creates a parent connection between the out and in, a parentConstraint or a multMatrix depending on the connection mode
 def connect(_out, _in, key):
+    if CONNECTION_MODE == "matrix":
+        multMatrix = matrixDriver(_out, _in, key)
+        cmds.connectAttr(multMatrix + ".matrixSum", _in + ".offsetParentMatrix", force=True)
+        return multMatrix
 
     parentConstraint = cmds.parentConstraint(_out, _in, maintainOffset=True)[0]
-    addObjectToList(key, parentConstraint)
+    addObjectToList(key, parentConstraint, "parentConstraint")
 
     return parentConstraint
 
-# clears the parent connection between the out and in
+# clears the parent connection between the out and in, either kind leaves the in where it currently is
 def disconnect(connection):
-    cmds.delete(connection)
\ No newline at end of file
+    if cmds.nodeType(connection) == "multMatrix":
+        # Keep the driven offsetParentMatrix at its current value instead of the default identity
+        for plug in cmds.listConnections(connection + ".matrixSum", source=False, destination=True, plugs=True) or []:
+            value = cmds.getAttr(plug)
+            cmds.disconnectAttr(connection + ".matrixSum", plug)
+            cmds.setAttr(plug, *value, type="matrix")
+    cmds.delete(connection)
+
+# Creates a multMatrix that outputs the offsetParentMatrix keeping driven where it is and following driver from now on,
+# like a parentConstraint with maintainOffset. The driven translate, rotate and scale keep working on top of it.
+# Returns the multMatrix, its matrixSum is left unconnected
+def matrixDriver(driver, driven, key):
+    selection = om2.MSelectionList()
+    selection.add(driver)
+    selection.add(driven)
+    driverWorld = selection.getDagPath(0).inclusiveMatrix()
+    drivenPath = selection.getDagPath(1)
+    localPlug = om2.MFnDependencyNode(drivenPath.node()).findPlug("matrix", False)
+    localMatrix = om2.MFnMatrixData(localPlug.asMObject()).matrix()
+
+    # world = local * offsetParentMatrix * parentMatrix, with offsetParentMatrix = offset * driverWorld * parentInverse
+    offset = localMatrix.inverse() * drivenPath.inclusiveMatrix() * driverWorld.inverse()
+
+    drivenName = driven.rsplit("|", 1)[-1]
+    multMatrix = cmds.createNode("multMatrix", name=f"multMatrix_{drivenName}_" + key, skipSelect=True)
+    addObjectToList(key, multMatrix, "multMatrix")
+    cmds.setAttr(multMatrix + ".matrixIn[0]", *[offset.getElement(row, column) for row in range(4) for column in range(4)], type="matrix")
+    cmds.connectAttr(driver + ".worldMatrix[0]", multMatrix + ".matrixIn[1]")
+    cmds.connectAttr(driven + ".parentInverseMatrix[0]", multMatrix + ".matrixIn[2]")
+    return multMatrix
+
+# Drives the offsetParentMatrix of driven from driver. The first driver is connected directly, the next ones are added
+# as targets of a blendMatrix whose input is the first driver, the matrix version of a constraint with several targets
+def addMatrixDriver(driver, driven, key):
+    multMatrix = matrixDriver(driver, driven, key)
+    sources = cmds.listConnections(driven + ".offsetParentMatrix", source=True, destination=False, plugs=True) or []
+    if not sources:
+        cmds.connectAttr(multMatrix + ".matrixSum", driven + ".offsetParentMatrix", force=True)
+        return multMatrix
+
+    sourceNode = sources[0].split(".", 1)[0]
+    if cmds.nodeType(sourceNode) == "blendMatrix":
+        blendMatrix = sourceNode
+    else:
+        drivenName = driven.rsplit("|", 1)[-1]
+        blendMatrix = cmds.createNode("blendMatrix", name=f"blendMatrix_{drivenName}_" + key, skipSelect=True)
+        addObjectToList(key, blendMatrix, "blendMatrix")
+        cmds.connectAttr(sources[0], blendMatrix + ".inputMatrix")
+        cmds.connectAttr(blendMatrix + ".outputMatrix", driven + ".offsetParentMatrix", force=True)
+    target = len(cmds.getAttr(blendMatrix + ".target", multiIndices=True) or [])
+    cmds.connectAttr(multMatrix + ".matrixSum", f"{blendMatrix}.target[{target}].targetMatrix")
+    return multMatrix
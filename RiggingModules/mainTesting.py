@@ -9,12 +9,25 @@ script_path = r"C:\\Users\\Asuch\\Desktop\\RiggingTool\\RiggingModules"
 if script_path not in sys.path:
     sys.path.append(script_path)
 
-# Reload py files uesd by modules
-import functionality
-importlib.reload(functionality)
-
+# Reload py files uesd by modules, dependencies before the modules that import them
+import registryBackends
+importlib.reload(registryBackends)
 import storeObjectsInJSON
 importlib.reload(storeObjectsInJSON)
+import transformMath
+importlib.reload(transformMath)
+import curveSampling
+importlib.reload(curveSampling)
+import controlShapeLibrary
+importlib.reload(controlShapeLibrary)
+import attributeBatch
+importlib.reload(attributeBatch)
+import dagBuilder
+importlib.reload(dagBuilder)
+import functionality
+importlib.reload(functionality)
+import cmdsProfiler
+importlib.reload(cmdsProfiler)
 
 ## Create Base Groups If They Dont Exist ##
 if not cmds.objExists("RIG_TEMP_GRP_ALL"):
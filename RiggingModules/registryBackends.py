@@ -0,0 +1,563 @@
+import os
+import re
+import json
+import mmap
+import struct
+import hashlib
+import sqlite3
+import tempfile
+import maya.cmds as cmds  # type: ignore
+
+# Storage backends for the generated objects registry (see storeObjectsInJSON).
+# Every backend exposes load() -> {key: {obj: info}} and commit(objects, changes), where
+# objects is the registry's in-memory {key: {obj: info}} and changes is the list of
+# ("add", key, obj, info) / ("clear", key) / ("replace",) records since the last commit.
+# info is a dict of optional node metadata such as {"uuid": ..., "type": "parentConstraint"}.
+# A backend may instead return a lazy snapshot from load() (anything with keys() and
+# decode(key)); the registry then holds NOT_DECODED for a key until it is first used.
+
+# Placeholder for a key whose objects have not been decoded from a lazy snapshot yet. Kept across reloads, the
+# registry survives them and may still hold the old placeholder
+NOT_DECODED = globals().get("NOT_DECODED", object())
+
+def readGeneratedObjectsFile(path):
+    """Reads a generated objects JSON file and returns its dictionary."""
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as file:
+                content = file.read().strip()
+                if not content:
+                    return {}  # Return empty dictionary if file is empty
+                return json.loads(content)
+        except json.JSONDecodeError:
+            print("Error: Failed to decode JSON. Resetting file.")
+            return {}  # Return empty dictionary if JSON is invalid
+    else:
+        return {}
+
+def writeJSONAtomic(path, data, indent=4):
+    """Writes data to a temp file next to path and renames it over path, so the file is never half written."""
+    directory = os.path.dirname(path) or "."
+    fd, tmpPath = tempfile.mkstemp(prefix=".generatedObjects_", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as file:
+            json.dump(data, file, indent=indent)
+        os.replace(tmpPath, path)
+    except BaseException:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+        raise
+
+def toFileDict(objects):
+    """
+    Converts the registry's {key: {obj: info}} into the JSON file layout.
+
+    Each key holds a list; objects without metadata are plain names and objects
+    with metadata are written as {"object": name, "uuid": ..., "type": ...}.
+    """
+    return {key: [dict(info, object=obj) if info else obj for obj, info in objs.items()]
+            for key, objs in objects.items()}
+
+def fromFileDict(data):
+    """Converts the JSON file layout back into {key: {obj: info}}."""
+    objects = {}
+    for key, entries in data.items():
+        objects[key] = {}
+        for entry in entries:
+            if isinstance(entry, dict):
+                info = dict(entry)
+                objects[key][info.pop("object")] = info or None
+            else:
+                objects[key][entry] = None
+    return objects
+
+def journalRecord(change):
+    """Drops an empty info field so plain add records stay short on disk."""
+    if change[0] == "add" and len(change) > 3 and not change[3]:
+        return list(change[:3])
+    return list(change)
+
+class JSONBackend:
+    """Stores the whole registry as one pretty-printed JSON file, rewritten on every commit."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        return fromFileDict(readGeneratedObjectsFile(self.path))
+
+    def commit(self, objects, changes):
+        writeJSONAtomic(self.path, toFileDict(objects))
+
+class JournalBackend:
+    """
+    Stores the registry as a JSON snapshot plus an append-only journal of changes.
+
+    Commits only append the new add/clear records to the journal, so their cost is
+    proportional to what changed. Loading replays the journal on top of the snapshot.
+    Once the journal grows past compactThreshold bytes it is folded into a fresh
+    snapshot and truncated. Replaying a journal over a snapshot that already contains
+    it gives the same result, so a crash between the two steps loses nothing.
+    """
+
+    def __init__(self, path, compactThreshold=1024 * 1024):
+        self.path = path
+        self.journalPath = path + ".journal"
+        self.compactThreshold = compactThreshold
+
+    def load(self):
+        data = fromFileDict(readGeneratedObjectsFile(self.path))
+        if os.path.exists(self.journalPath):
+            with open(self.journalPath, 'r') as file:
+                for line in file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from an interrupted write, everything before it is valid
+                        print("Warning: Ignoring a damaged record at the end of the registry journal.")
+                        break
+                    self._apply(data, record)
+        return data
+
+    @staticmethod
+    def _apply(data, record):
+        op = record[0]
+        if op == "add":
+            data.setdefault(record[1], {})[record[2]] = record[3] if len(record) > 3 else None
+        elif op == "clear":
+            data[record[1]] = {}
+
+    def commit(self, objects, changes):
+        # A full replace cannot be expressed as a journal entry, write a snapshot instead
+        if any(change[0] == "replace" for change in changes):
+            self.compact(objects)
+            return
+        if changes:
+            with open(self.journalPath, 'a') as file:
+                file.write("".join(json.dumps(journalRecord(change)) + "\n" for change in changes))
+        if self.journalSize() > self.compactThreshold:
+            self.compact(objects)
+
+    def journalSize(self):
+        return os.path.getsize(self.journalPath) if os.path.exists(self.journalPath) else 0
+
+    def compact(self, objects):
+        """Writes the current state as a snapshot and empties the journal."""
+        writeJSONAtomic(self.path, toFileDict(objects))
+        if os.path.exists(self.journalPath):
+            os.remove(self.journalPath)
+
+class SQLiteBackend:
+    """
+    Stores the registry in an SQLite database next to the JSON file.
+
+    One row per tracked object with its key, name, UUID, node type, teardown role
+    and creation order, indexed by key and by object name. Besides the regular load/commit it
+    answers queries such as "all constraints for key X" or "which key owns node Y"
+    straight from the indexes, without loading the registry.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS objects (
+            key TEXT NOT NULL,
+            object TEXT NOT NULL,
+            uuid TEXT,
+            type TEXT,
+            role TEXT,
+            created_order INTEGER NOT NULL,
+            PRIMARY KEY (key, object)
+        );
+        CREATE INDEX IF NOT EXISTS objects_key_idx ON objects (key, created_order);
+        CREATE INDEX IF NOT EXISTS objects_object_idx ON objects (object);
+        CREATE TABLE IF NOT EXISTS registry_keys (key TEXT PRIMARY KEY);
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.dbPath = os.path.splitext(path)[0] + ".sqlite"
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.dbPath)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(self.SCHEMA)
+            # Databases created before roles were tracked
+            columns = [row[1] for row in self._connection.execute("PRAGMA table_info(objects)")]
+            if "role" not in columns:
+                self._connection.execute("ALTER TABLE objects ADD COLUMN role TEXT")
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def load(self):
+        # Keys are kept separately so emptied lists survive, like in the JSON file
+        data = {key: {} for (key,) in self.connection.execute("SELECT key FROM registry_keys")}
+        rows = self.connection.execute("SELECT key, object, uuid, type, role FROM objects ORDER BY key, created_order")
+        for key, obj, uuid, nodeType, role in rows:
+            info = {name: value for name, value in (("uuid", uuid), ("type", nodeType), ("role", role)) if value}
+            data.setdefault(key, {})[obj] = info or None
+        return data
+
+    def commit(self, objects, changes):
+        with self.connection as connection:
+            for change in changes:
+                op = change[0]
+                if op == "add":
+                    self._insert(connection, change[1], change[2], change[3] if len(change) > 3 else None)
+                elif op == "clear":
+                    connection.execute("INSERT OR IGNORE INTO registry_keys (key) VALUES (?)", (change[1],))
+                    connection.execute("DELETE FROM objects WHERE key = ?", (change[1],))
+                elif op == "replace":
+                    connection.execute("DELETE FROM objects")
+                    connection.execute("DELETE FROM registry_keys")
+                    for key, objs in objects.items():
+                        connection.execute("INSERT INTO registry_keys (key) VALUES (?)", (key,))
+                        connection.executemany(
+                            "INSERT OR IGNORE INTO objects (key, object, uuid, type, role, created_order) VALUES (?, ?, ?, ?, ?, ?)",
+                            [(key, obj, (info or {}).get("uuid"), (info or {}).get("type"), (info or {}).get("role"), order)
+                             for order, (obj, info) in enumerate(objs.items())])
+                    # Everything after a replace is already part of objects
+                    break
+
+    @staticmethod
+    def _insert(connection, key, obj, info):
+        info = info or {}
+        connection.execute("INSERT OR IGNORE INTO registry_keys (key) VALUES (?)", (key,))
+        connection.execute(
+            """INSERT OR IGNORE INTO objects (key, object, uuid, type, role, created_order)
+               VALUES (?, ?, ?, ?, ?, (SELECT COALESCE(MAX(created_order), -1) + 1 FROM objects WHERE key = ?))""",
+            (key, obj, info.get("uuid"), info.get("type"), info.get("role"), key))
+
+    def objectsForKey(self, key, nodeType=None):
+        """Returns the objects of a key in creation order, optionally only those of one node type."""
+        if nodeType is None:
+            rows = self.connection.execute(
+                "SELECT object FROM objects WHERE key = ? ORDER BY created_order", (key,))
+        else:
+            rows = self.connection.execute(
+                "SELECT object FROM objects WHERE key = ? AND type = ? ORDER BY created_order", (key, nodeType))
+        return [obj for (obj,) in rows]
+
+    def keysOf(self, obj):
+        """Returns every key that tracks an object name."""
+        return [key for (key,) in self.connection.execute("SELECT key FROM objects WHERE object = ?", (obj,))]
+
+class ShardedBackend:
+    """
+    Stores each registry key in its own small JSON file under a shard directory.
+
+    A commit only rewrites the shards of the keys it changed, so several headless
+    Maya processes building different modules never write the same file. Shard
+    names are derived from the key, so no shared state is needed to find them.
+    index.json maps keys to shard files for tooling; it is merged on every write
+    and load also picks up shards missing from it, so a lost index update from a
+    concurrent build is harmless. A full replace only rewrites and removes shards of
+    keys this process loaded or wrote; shards of other processes are left alone.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, path):
+        self.path = path
+        self.directory = os.path.splitext(path)[0] + "_shards"
+        # Keys loaded from or written to the shard directory by this process
+        self._knownKeys = set()
+
+    @staticmethod
+    def shardName(key):
+        """Returns a filesystem-safe, collision-free file name for a key."""
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", key)[:64]
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+        return f"{safe}_{digest}.json"
+
+    def load(self):
+        data = {}
+        if not os.path.isdir(self.directory):
+            return data
+        for name in sorted(os.listdir(self.directory)):
+            if name == self.INDEX_FILE or not name.endswith(".json"):
+                continue
+            shard = readGeneratedObjectsFile(os.path.join(self.directory, name))
+            if "key" in shard:
+                data.update(fromFileDict({shard["key"]: shard.get("objects", [])}))
+        self._knownKeys.update(data)
+        return data
+
+    def commit(self, objects, changes):
+        os.makedirs(self.directory, exist_ok=True)
+        dropped = set()
+        if any(change[0] == "replace" for change in changes):
+            touched = list(objects)
+            # Keys this process knew and no longer has lose their shard, other processes' shards are not ours to remove
+            dropped = self._knownKeys - set(objects)
+            for key in dropped:
+                shardPath = os.path.join(self.directory, self.shardName(key))
+                if os.path.exists(shardPath):
+                    os.remove(shardPath)
+        else:
+            touched = list(dict.fromkeys(change[1] for change in changes))
+        for key in touched:
+            shard = {"key": key, "objects": toFileDict({key: objects.get(key, {})})[key]}
+            writeJSONAtomic(os.path.join(self.directory, self.shardName(key)), shard)
+        self._knownKeys.update(touched)
+        self._knownKeys -= dropped
+        if touched or dropped:
+            self._updateIndex(touched, dropped)
+
+    def _updateIndex(self, keys, dropped=()):
+        # Merged with the file on disk, entries of other processes stay
+        indexPath = os.path.join(self.directory, self.INDEX_FILE)
+        index = readGeneratedObjectsFile(indexPath)
+        changed = False
+        for key in dropped:
+            if index.pop(key, None) is not None:
+                changed = True
+        missing = [key for key in keys if key not in index]
+        if missing:
+            index.update({key: self.shardName(key) for key in missing})
+            changed = True
+        if changed:
+            writeJSONAtomic(indexPath, index)
+
+class BinarySnapshot:
+    """
+    Read-only, memory-mapped view of a binary registry snapshot.
+
+    Layout (little endian):
+        header   magic "RGOB", u16 version, u16 reserved, u32 stringCount, u32 keyCount,
+                 u32 stringTableOffset, u32 keyTableOffset
+        strings  stringCount x (u32 offset, u32 length) into a UTF-8 blob that follows
+        keys     keyCount x (u32 keyString, u32 objectCount, u32 entriesOffset)
+        entries  objectCount x (u32 object, u32 uuid, u32 type, u32 role) string indices,
+                 NO_STRING when a field is empty
+
+    Every string (names, UUIDs, node types, roles) is stored once. Opening only reads the
+    header and the key table; a key's entries are decoded the first time it is accessed.
+    """
+
+    MAGIC = b"RGOB"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHHIIII")
+    STRING = struct.Struct("<II")
+    KEY = struct.Struct("<III")
+    ENTRY = struct.Struct("<IIII")
+    NO_STRING = 0xFFFFFFFF
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._map = None
+        self._keys = {}
+        self._strings = {}
+        self.open()
+
+    def open(self):
+        self.close()
+        self._keys = {}
+        self._strings = {}
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, stringCount, keyCount, self._stringTable, keyTable = self.HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a version {self.VERSION} registry snapshot")
+        self._blobOffset = self._stringTable + stringCount * self.STRING.size
+        for keyIndex, count, offset in self.KEY.iter_unpack(self._map[keyTable:keyTable + keyCount * self.KEY.size]):
+            self._keys[self._string(keyIndex)] = (count, offset)
+
+    def close(self):
+        """Releases the mapping, which Windows requires before the file can be replaced."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _string(self, index):
+        if index == self.NO_STRING:
+            return None
+        string = self._strings.get(index)
+        if string is None:
+            offset, length = self.STRING.unpack_from(self._map, self._stringTable + index * self.STRING.size)
+            start = self._blobOffset + offset
+            string = self._strings[index] = self._map[start:start + length].decode("utf-8")
+        return string
+
+    def keys(self):
+        return list(self._keys)
+
+    def decode(self, key):
+        """Returns {obj: info} for one key."""
+        count, offset = self._keys[key]
+        objects = {}
+        for objIndex, uuidIndex, typeIndex, roleIndex in self.ENTRY.iter_unpack(self._map[offset:offset + count * self.ENTRY.size]):
+            info = {name: self._string(index) for name, index in (("uuid", uuidIndex), ("type", typeIndex), ("role", roleIndex))
+                    if index != self.NO_STRING}
+            objects[self._string(objIndex)] = info or None
+        return objects
+
+def encodeBinarySnapshot(objects):
+    """Encodes {key: {obj: info}} into the BinarySnapshot layout and returns the bytes."""
+    strings = {}
+
+    def intern(string):
+        if not string:
+            return BinarySnapshot.NO_STRING
+        index = strings.get(string)
+        if index is None:
+            index = strings[string] = len(strings)
+        return index
+
+    keyRecords = []
+    entries = bytearray()
+    for key, objs in objects.items():
+        keyRecords.append((intern(key), len(objs), len(entries)))
+        for obj, info in objs.items():
+            info = info or {}
+            entries += BinarySnapshot.ENTRY.pack(intern(obj), intern(info.get("uuid")), intern(info.get("type")), intern(info.get("role")))
+
+    blob = bytearray()
+    stringTable = bytearray()
+    for string in strings:
+        encoded = string.encode("utf-8")
+        stringTable += BinarySnapshot.STRING.pack(len(blob), len(encoded))
+        blob += encoded
+
+    stringTableOffset = BinarySnapshot.HEADER.size
+    keyTableOffset = stringTableOffset + len(stringTable) + len(blob)
+    entriesOffset = keyTableOffset + len(keyRecords) * BinarySnapshot.KEY.size
+    keyTable = b"".join(BinarySnapshot.KEY.pack(keyIndex, count, entriesOffset + offset) for keyIndex, count, offset in keyRecords)
+    header = BinarySnapshot.HEADER.pack(BinarySnapshot.MAGIC, BinarySnapshot.VERSION, 0, len(strings), len(keyRecords),
+                                        stringTableOffset, keyTableOffset)
+    return bytes(header + stringTable + blob + keyTable + entries)
+
+def writeBytesAtomic(path, data):
+    """Writes bytes to a temp file next to path and renames it over path."""
+    directory = os.path.dirname(path) or "."
+    fd, tmpPath = tempfile.mkstemp(prefix=".generatedObjects_", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        os.replace(tmpPath, path)
+    except BaseException:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+        raise
+
+class BinaryBackend:
+    """
+    Stores the registry as a compact binary snapshot (see BinarySnapshot) next to the JSON file.
+
+    load() returns the memory-mapped snapshot itself, so opening the registry costs
+    almost nothing and keys are decoded only when a module touches them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.binaryPath = os.path.splitext(path)[0] + ".rgob"
+        self._snapshot = None
+
+    def load(self):
+        if self._snapshot is None:
+            self._snapshot = BinarySnapshot(self.binaryPath)
+        else:
+            self._snapshot.open()
+        return self._snapshot
+
+    def commit(self, objects, changes):
+        # Keys never touched since loading are copied from the current snapshot
+        resolved = {key: self._snapshot.decode(key) if objs is NOT_DECODED else objs for key, objs in objects.items()}
+        data = encodeBinarySnapshot(resolved)
+        if self._snapshot is not None:
+            self._snapshot.close()
+        writeBytesAtomic(self.binaryPath, data)
+        # Remap so keys still marked NOT_DECODED in the registry decode from the new file
+        if self._snapshot is not None:
+            self._snapshot.open()
+
+def convertJSONToBinary(jsonPath, binaryPath):
+    """Converts a generatedObjects JSON file into a binary snapshot."""
+    writeBytesAtomic(binaryPath, encodeBinarySnapshot(fromFileDict(readGeneratedObjectsFile(jsonPath))))
+
+def convertBinaryToJSON(binaryPath, jsonPath):
+    """Converts a binary snapshot back into the pretty-printed JSON layout for debugging."""
+    snapshot = BinarySnapshot(binaryPath)
+    try:
+        writeJSONAtomic(jsonPath, toFileDict({key: snapshot.decode(key) for key in snapshot.keys()}))
+    finally:
+        snapshot.close()
+
+class SceneBackend:
+    """
+    Keeps the registry inside the open Maya scene on a network node.
+
+    The registry is read from the node once when the scene is opened and then only
+    lives in memory; commit() just marks it as changed. writeToScene() stores it as
+    one compact JSON string attribute and is called from a before-save callback
+    (see storeObjectsInJSON.installSceneCallbacks), so no file I/O happens during
+    builds and the registry travels with the scene.
+    """
+
+    NODE_NAME = "rigNode_generatedObjects"
+    ATTRIBUTE = "registryData"
+
+    def __init__(self, path=None):
+        self.path = path
+        self.pending = False
+
+    def load(self):
+        self.pending = False
+        plug = f"{self.NODE_NAME}.{self.ATTRIBUTE}"
+        if not cmds.objExists(plug):
+            return {}
+        content = cmds.getAttr(plug)
+        if not content:
+            return {}
+        try:
+            return fromFileDict(json.loads(content))
+        except json.JSONDecodeError:
+            print(f"Error: Failed to decode the registry stored on {self.NODE_NAME}. Starting empty.")
+            return {}
+
+    def commit(self, objects, changes):
+        if changes:
+            self.pending = True
+
+    def writeToScene(self, objects):
+        """Writes the registry to the scene node, creating it if needed."""
+        if not self.pending and cmds.objExists(self.NODE_NAME):
+            return
+        if not cmds.objExists(self.NODE_NAME):
+            cmds.createNode("network", name=self.NODE_NAME, skipSelect=True)
+        if not cmds.attributeQuery(self.ATTRIBUTE, node=self.NODE_NAME, exists=True):
+            cmds.addAttr(self.NODE_NAME, longName=self.ATTRIBUTE, dataType="string")
+        data = json.dumps(toFileDict(objects), separators=(",", ":"))
+        cmds.setAttr(f"{self.NODE_NAME}.{self.ATTRIBUTE}", data, type="string")
+        self.pending = False
+
+BACKENDS = {
+    "json": JSONBackend,
+    "journal": JournalBackend,
+    "sqlite": SQLiteBackend,
+    "sharded": ShardedBackend,
+    "binary": BinaryBackend,
+    "scene": SceneBackend,
+}
+
+def createBackend(name, path, **kwargs):
+    """Creates a registry backend by name."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown registry backend: {name}. Available: {', '.join(BACKENDS)}")
+    return BACKENDS[name](path, **kwargs)
@@ -2,22 +2,25 @@ import maya.cmds as cmds # type: ignore
 from PySide2 import QtWidgets, QtGui
 
 from addon_SquashAndStretch import addon_SquashAndStretch
-from functionality import importer, templateImporter, createOffsetGrp, matchTransform, createGroup, createJoints, constraintJointChains, createFKControls, setupIKFKSwitch, setupIKFKVisibility, lockAttributes, subdivideJointChain, snapJointsToCurve, createSplineIK, addTwistToSpline
-from storeObjectsInJSON import loadGeneratedObjects, cleanSpecificList, addObjectToList
-
-generatedObjects = loadGeneratedObjects()  # Load existing data from JSON file at the start
+from functionality import importer, templateImporter, templateNode, templateLocalName, createOffsetGrp, matchTransform, createGroup, newHierarchy, buildHierarchy, groupName, createJoints, constraintDriverChains, createFKControls, setupIKFKSwitch, setupIKFKVisibility, lockAttributes, createCurveJointChains, locatorWorldPositions, createSplineIK, addTwistToSpline
+from storeObjectsInJSON import cleanSpecificList, buildSession
+from attributeBatch import batchAttributes
 
+@buildSession()
 def template(numControlJoints=3, identifier="NULL"):
     key = "SSIKTEMP" + str(numControlJoints) + "_" + identifier
     cleanSpecificList(key)
     templateImporter("Scenes\\Templates\\splineSpineIK" + "_0" + str(numControlJoints) +".ma", key)
     #cmds.parent(template[0], "RIG_TEMP_GRP_ALL")
 
+@buildSession()
+@batchAttributes()
 def splineSpineIK(numControlJoints=3, identifier="NULL", numJoints = 5, addon = "NULL"):
     cmds.select(clear=True)
     tempKey = "SSIKTEMP"
     # Adding the numControls at the end to determine the correct group to look through
-    TEMPGroupName = f"splineSpineIK_TEMPLATE_0{numControlJoints}" + "_" + tempKey +  str(numControlJoints) + "_" + identifier
+    templateKey = tempKey + str(numControlJoints) + "_" + identifier
+    TEMPGroupName = templateNode(f"splineSpineIK_TEMPLATE_0{numControlJoints}", templateKey)
     locators = []
 
     # Get locators from imported template and add them to the locator list
@@ -33,46 +36,28 @@ def splineSpineIK(numControlJoints=3, identifier="NULL", numJoints = 5, addon =
     # Define the key that will be used in every object created by the code to identifiy it
     key = "SSIK" + str(numControlJoints) + "_" + identifier
 
-    spineCurve = f"spineCurve_TEMP_0{numControlJoints}" + "_" + tempKey + str(numControlJoints) + "_" + identifier
+    spineCurve = templateNode(f"spineCurve_TEMP_0{numControlJoints}", templateKey)
     
     ctrlJointNames = []
 
     # loop though locators to create control joints and rename
     for loc in locators:
-        nameReplace = loc.replace("LOC", "JNT")  # Replace "LOC" with "JNT"
+        nameReplace = templateLocalName(loc, templateKey).replace("LOC", "JNT")  # Replace "LOC" with "JNT"
         newName = nameReplace + key
         ctrlJointNames.append(newName)
 
-    # Set up temporary start and end joints
-    tmpJointNames = ["startJoint", "endJoint"]
-    tmpJoints = []
-    tmpLocators = [locators[0], locators[-1]]
-    tmpLocatorPositions = {}
-
     # Set up IK FK and ENV joints
-    ikJoints = []
-    fkJoints = []
-    envJoints = []
     ctrlJoints = []
     locatorPositions = {}
 
     # Clean JSON file and scene before running script
     cleanSpecificList(key)
 
-    # Create start and end joitns
-    createJoints(jointNames=tmpJointNames,joints=tmpJoints, locators=tmpLocators, locatorPositions=tmpLocatorPositions, key=key)
-
-    # IK joint chain
-    ikJoints = subdivideJointChain(tmpStartEndJoints=tmpJoints, jointSubdiv=numJoints, key=key, name="spine_IK", nameFirstJoint="pelvis_IK")
-    snapJointsToCurve(curve=spineCurve, jointChain=ikJoints, key=key)
-
-    # FK joint chain
-    fkJoints = subdivideJointChain(tmpStartEndJoints=tmpJoints, jointSubdiv=numJoints, key=key, name = "spine_FK", nameFirstJoint="pelvis_FK")
-    snapJointsToCurve(curve=spineCurve, jointChain=fkJoints, key=key)
-    # ENV joint chain
-    envJoints = subdivideJointChain(tmpStartEndJoints=tmpJoints, jointSubdiv=numJoints, key=key, name = "spine_ENV", nameFirstJoint="pelvis_ENV")
-    snapJointsToCurve(curve=spineCurve, jointChain=fkJoints, key=key)
-    snapJointsToCurve(curve=spineCurve, jointChain=envJoints, key=key)
+    # IK, FK and ENV joint chains, created in place along the curve in one build
+    startPosition = locatorWorldPositions([locators[0]])[locators[0]]
+    spineChains = createCurveJointChains(curve=spineCurve, startPosition=startPosition, jointSubdiv=numJoints, key=key,
+                                         chains={"IK": ("spine_IK", "pelvis_IK"), "FK": ("spine_FK", "pelvis_FK"), "ENV": ("spine_ENV", "pelvis_ENV")})
+    ikJoints, fkJoints, envJoints = spineChains["IK"], spineChains["FK"], spineChains["ENV"]
 
     # Create FK spine contols
     fkControls, fkControlOffsetGrps = createFKControls(control="Scenes\\circle.ma", fkChain=fkJoints, rotOffset=[90,0,0],scaleOffset=[4,4,4], key=key)
@@ -81,7 +66,7 @@ def splineSpineIK(numControlJoints=3, identifier="NULL", numJoints = 5, addon =
     ctrlJoints, locatorPositions = createJoints(jointNames=ctrlJointNames, joints=ctrlJoints, locators=locators, locatorPositions=locatorPositions, key=key, radius=3, parent=False)
     
     # Create Spline IK
-    ikHandle, duplicatedCurve = createSplineIK(controlJoints=ctrlJoints, curveIK=spineCurve, jointChain=ikJoints, key=key)
+    ikHandle, duplicatedCurve = createSplineIK(controlJoints=ctrlJoints, curveIK=spineCurve, jointChain=ikJoints, key=key, templateKey=templateKey)
 
     ikControls = []
     ikCtrlGrp = createGroup(name="IK_CTRL_GRP", key=key)
@@ -91,48 +76,44 @@ def splineSpineIK(numControlJoints=3, identifier="NULL", numJoints = 5, addon =
         offsetGrp = createOffsetGrp(item=control, key=key)  # Create offset group
         cmds.parent(offsetGrp, ikCtrlGrp)  # Parent it under IK_CTRL_GRP
 
-    constraintJointChains(rootJntOne=ikJoints[0], rootJntTwo=envJoints[0], key=key)
-    constraintJointChains(rootJntOne=fkJoints[0], rootJntTwo=envJoints[0], key=key)
+    switchWeights = constraintDriverChains(driverChains=[ikJoints, fkJoints], drivenChain=envJoints, key=key)
 
     switchControl = importer(item="Scenes\\arrow.ma", name="Spine_Settings_" + key, key=key, scale = [0.25, 0.25, 0.25], lineWidth=2.0, colour=6)
     matchTransform(source=switchControl, target=locators[1], transOffset=[5,0,0], rotOffset=[90,0,90])
     switchControlOffsetGrp = createOffsetGrp(item=switchControl, key=key)
-    setupIKFKSwitch(envChain=envJoints, fkChain=fkJoints, ikChain=ikJoints, key=key, switchCtrl=switchControl)
+    setupIKFKSwitch(envChain=envJoints, fkChain=fkJoints, ikChain=ikJoints, key=key, switchCtrl=switchControl, weights=switchWeights)
 
     setupIKFKVisibility(fkControls=fkControls, ikControls=ikControls, switchCtrl=switchControl, key=key)
 
     addTwistToSpline(controls=ikControls, ikHandle=ikHandle, key=key)
 
-    # Clean-up: Group remaining items
-    jointGrp = createGroup(name="joints", key=key)
-    cmds.parent(ikJoints[0], jointGrp)
-    cmds.parent(fkJoints[0], jointGrp)
-    cmds.parent(envJoints[0], jointGrp)
+    # Clean-up: Group remaining items, the groups and all parenting are created in one go
+    rigHierarchy = newHierarchy()
 
-    fkCtrlGrp = createGroup(name="FK_CTRL_GRP", key=key)
-    cmds.parent(fkControlOffsetGrps[0], fkCtrlGrp)
-    #cmds.parent("pelvis_FK_SSIK_CTRL_OffsetGrp", fkCtrlGrp)
+    ## Parent to base groups ##
+    splineSpineIKRigGrp = rigHierarchy.addGroup(groupName("splineSpineIK_RIG", key), parent="RIG_GRP_ALL")
 
-    ctrlJointsGrp = createGroup(name="ctrlJoints", key=key)
-    cmds.parent(ctrlJoints, ctrlJointsGrp)
-    cmds.parent(ctrlJointsGrp, jointGrp)
+    jointGrp = rigHierarchy.addGroup(groupName("joints", key), parent=splineSpineIKRigGrp)
+    rigHierarchy.parent(ikJoints[0], jointGrp)
+    rigHierarchy.parent(fkJoints[0], jointGrp)
+    rigHierarchy.parent(envJoints[0], jointGrp)
 
-    controlsGrp = createGroup(name="controls", key=key)
-    cmds.parent(ikCtrlGrp, controlsGrp)
-    cmds.parent(fkCtrlGrp, controlsGrp)
-    cmds.parent(switchControlOffsetGrp, controlsGrp)
+    ctrlJointsGrp = rigHierarchy.addGroup(groupName("ctrlJoints", key), parent=jointGrp)
+    for ctrlJoint in ctrlJoints:
+        rigHierarchy.parent(ctrlJoint, ctrlJointsGrp)
 
-    splineSpineIKRigGrp = createGroup(name="splineSpineIK_RIG", key=key)
-    cmds.parent(jointGrp, splineSpineIKRigGrp)
-    cmds.parent(controlsGrp, splineSpineIKRigGrp)
-    cmds.parent(ikHandle, splineSpineIKRigGrp)
-    cmds.parent(duplicatedCurve, splineSpineIKRigGrp)
+    controlsGrp = rigHierarchy.addGroup(groupName("controls", key), parent=splineSpineIKRigGrp)
+    rigHierarchy.parent(ikCtrlGrp, controlsGrp)
+    fkCtrlGrp = rigHierarchy.addGroup(groupName("FK_CTRL_GRP", key), parent=controlsGrp)
+    rigHierarchy.parent(fkControlOffsetGrps[0], fkCtrlGrp)
+    #cmds.parent("pelvis_FK_SSIK_CTRL_OffsetGrp", fkCtrlGrp)
+    rigHierarchy.parent(switchControlOffsetGrp, controlsGrp)
 
-    ## Parent to base groups ##
-    cmds.parent(splineSpineIKRigGrp, "RIG_GRP_ALL")
+    rigHierarchy.parent(ikHandle, splineSpineIKRigGrp)
+    rigHierarchy.parent(duplicatedCurve, splineSpineIKRigGrp)
 
-    # Clean-up: Delete tmp items
-    cmds.delete(tmpJointNames)
+    buildHierarchy(rigHierarchy, key, roots=[splineSpineIKRigGrp])
+    splineSpineIKRigGrp = rigHierarchy.name(splineSpineIKRigGrp)
 
     # Clean-up: lock and hide attributes
     #lockAttributes()
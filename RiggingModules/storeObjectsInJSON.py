@@ -1,58 +1,492 @@
 import os
-import json
+import time
+import atexit
+from contextlib import contextmanager
 import maya.cmds as cmds  # type: ignore
+import maya.api.OpenMaya as om2  # type: ignore
+from registryBackends import createBackend, NOT_DECODED
 
 PERSISTENT_FILE_PATH = os.path.abspath("C:\\Users\\Asuch\\Desktop\\RiggingTool\\generatedObjects.json")
 
+# Node types that live outside the DAG and are not removed with a deleted parent
+DG_NODE_TYPES = {"blendColors", "reverse", "multiplyDivide", "plusMinusAverage", "curveInfo", "skinCluster",
+                 "multMatrix", "blendMatrix"}
+
+# Storage format of the registry: "json" (one snapshot), "journal" (append-only log), "sqlite",
+# "sharded" (one file per key, for parallel batch builds), "binary" (memory-mapped snapshot)
+# or "scene" (stored in the Maya scene)
+REGISTRY_BACKEND = "json"
+
+class GeneratedObjectsRegistry:
+    """
+    In-memory registry of the objects every rig module creates.
+
+    Each key maps to a dict used as an ordered set, so duplicate checks are O(1)
+    and insertion order is kept. Each object can carry metadata such as its Maya
+    UUID and node type. A reverse index maps every object (by name and by UUID)
+    back to the key that owns it and its creation order. Changes are only handed to the
+    storage backend on flush(), together with the list of changes made since
+    the last flush.
+
+    With a lazy backend (binary snapshots) a key's objects are decoded the first
+    time the key is used, and the reverse index is built on the first owner() query.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._objects = None
+        self._lazy = None
+        self._owners = {}
+        self._order = 0
+        self._dirty = False
+        self._changes = []
+        self._sessions = []
+
+    @property
+    def path(self):
+        return self.backend.path
+
+    def _ensureLoaded(self):
+        """Loads the file the first time the registry is touched."""
+        if self._objects is None:
+            data = self.backend.load()
+            if hasattr(data, "decode"):
+                # Lazy snapshot: only the key names are read now
+                self._lazy = data
+                self._objects = dict.fromkeys(data.keys(), NOT_DECODED)
+                self._owners = None
+            else:
+                self._lazy = None
+                self._objects = {key: dict(objects) if isinstance(objects, dict) else dict.fromkeys(objects)
+                                 for key, objects in data.items()}
+                self._rebuildOwners()
+            self._dirty = False
+            self._changes = []
+
+    def _bucket(self, key, create=False):
+        """Returns the {obj: info} dict of a key, decoding it from a lazy snapshot if needed."""
+        self._ensureLoaded()
+        objects = self._objects.get(key)
+        if objects is NOT_DECODED:
+            objects = self._objects[key] = self._lazy.decode(key)
+        elif objects is None and create:
+            objects = self._objects[key] = {}
+        return objects if objects is not None else {}
+
+    def _decodeAll(self):
+        self._ensureLoaded()
+        for key, objects in self._objects.items():
+            if objects is NOT_DECODED:
+                self._objects[key] = self._lazy.decode(key)
+        return self._objects
+
+    def _ownersIndex(self):
+        if self._owners is None:
+            self._decodeAll()
+            self._rebuildOwners()
+        return self._owners
+
+    def _rebuildOwners(self):
+        """Rebuilds the object -> (key, creation order) index from the forward lists."""
+        self._owners = {}
+        self._order = 0
+        for key, objects in self._objects.items():
+            for obj, info in objects.items():
+                self._setOwner(obj, key, info)
+
+    def _setOwner(self, obj, key, info=None):
+        if self._owners is None:
+            return
+        self._saveOwner(obj)
+        self._owners[obj] = (key, self._order)
+        if info and info.get("uuid"):
+            self._saveOwner(info["uuid"])
+            self._owners[info["uuid"]] = (key, self._order)
+        self._order += 1
+
+    def _saveBucket(self, key):
+        """Copies a key's objects into every open session the first time the key changes in it, None if it is new."""
+        for session in self._sessions:
+            if session["objects"] is self._objects and key not in session["buckets"]:
+                session["buckets"][key] = dict(self._bucket(key)) if key in self._objects else None
+
+    def _saveOwner(self, ref):
+        """Keeps the reverse index entry of ref in every open session the first time it changes in it."""
+        for session in self._sessions:
+            if session["owners"] is self._owners and ref not in session["ownerRefs"]:
+                session["ownerRefs"][ref] = self._owners.get(ref)
+
+    def setBackend(self, backend):
+        """Writes pending changes with the current backend, then switches to a new one."""
+        self._decodeAll()
+        self.flush()
+        # Fold a journal into its snapshot so the new backend does not see a stale log
+        if hasattr(self.backend, "compact"):
+            self.backend.compact(self._objects)
+        backend.commit(self._objects, [("replace",)])
+        self.backend = backend
+
+    def reload(self):
+        """Drops the in-memory state, unflushed changes included, and re-reads the file."""
+        self._objects = None
+        self._ensureLoaded()
+
+    def objects(self):
+        """Returns the live {key: {obj: info}} mapping. Treat it as read-only."""
+        return self._decodeAll()
+
+    def keys(self):
+        self._ensureLoaded()
+        return list(self._objects)
+
+    def get(self, key):
+        """Returns the objects stored under key, in creation order."""
+        return list(self._bucket(key))
+
+    def items(self, key):
+        """Returns (object, info) pairs stored under key, in creation order."""
+        return [(obj, info or {}) for obj, info in self._bucket(key).items()]
+
+    def info(self, key, obj):
+        """Returns the metadata stored with an object, e.g. {"type": "joint"}."""
+        return self._bucket(key).get(obj) or {}
+
+    def getOfType(self, key, nodeType):
+        """Returns the objects under key that were registered with the given node type."""
+        return [obj for obj, info in self._bucket(key).items() if info and info.get("type") == nodeType]
+
+    def owner(self, obj):
+        """Returns (key, creation order) for a tracked object, or None. O(1)."""
+        return self._ownersIndex().get(obj)
+
+    def contains(self, key, obj):
+        return obj in self._bucket(key)
+
+    def asDict(self):
+        """Returns a plain dict of lists, the same layout as the JSON file."""
+        return {key: list(objects) for key, objects in self._decodeAll().items()}
+
+    def replace(self, objects):
+        """Replaces the whole registry with a dict of lists."""
+        self._objects = {key: dict.fromkeys(objs) for key, objs in objects.items()}
+        self._lazy = None
+        self._rebuildOwners()
+        self._dirty = True
+        self._changes = [("replace",)]
+
+    def add(self, key, obj, info=None):
+        """Adds obj under key with optional metadata. Returns False if it was already tracked."""
+        if obj in self._bucket(key):
+            return False
+        self._saveBucket(key)
+        self._bucket(key, create=True)[obj] = info
+        self._setOwner(obj, key, info)
+        self._dirty = True
+        self._changes.append(("add", key, obj, info))
+        self._recordCreated([(obj, info)])
+        return True
+
+    def addMany(self, key, objs, info=None):
+        """Adds several objects under key, skipping ones already tracked."""
+        objects = self._bucket(key)
+        new = [obj for obj in dict.fromkeys(objs) if obj not in objects]
+        if new:
+            self._saveBucket(key)
+        self._bucket(key, create=True).update(dict.fromkeys(new, info))
+        for obj in new:
+            self._setOwner(obj, key, info)
+        if new:
+            self._dirty = True
+            self._changes.extend(("add", key, obj, info) for obj in new)
+        self._recordCreated([(obj, info) for obj in new])
+
+    def clear(self, key):
+        """Empties the list for key (the key itself is kept) and returns what was in it."""
+        current = self._bucket(key)
+        removed = list(current)
+        self._saveBucket(key)
+        if self._owners is not None:
+            for obj, info in current.items():
+                for ref in (obj, (info or {}).get("uuid")):
+                    if ref and self._owners.get(ref, (None,))[0] == key:
+                        self._saveOwner(ref)
+                        del self._owners[ref]
+        self._objects[key] = {}
+        self._dirty = True
+        self._changes.append(("clear", key))
+        return removed
+
+    def isDirty(self):
+        return self._dirty
+
+    def _recordCreated(self, items):
+        """Remembers newly tracked objects (by UUID when known) in every open build session."""
+        if not self._sessions:
+            return
+        refs = [(info or {}).get("uuid") or obj for obj, info in items]
+        for session in self._sessions:
+            session["created"].extend(refs)
+
+    def flush(self, force=False):
+        """Writes the registry to disk if anything changed since the last flush."""
+        if self._objects is None or (not self._dirty and not force):
+            return
+        # Inside a build session the write is deferred until the session commits
+        if self._sessions and not force:
+            return
+        self.backend.commit(self._objects, self._changes if not force else [("replace",)])
+        self._dirty = False
+        self._changes = []
+
+    def beginSession(self):
+        """
+        Opens a build session that can be rolled back. Nothing is copied up front: a key's objects
+        and a reverse index entry are copied into the session the first time they change.
+        """
+        self._ensureLoaded()
+        session = {
+            # The live dicts when the session began, replace() and reload() swap in new ones and leave these alone
+            "objects": self._objects,
+            "buckets": {},
+            "owners": self._owners,
+            "ownerRefs": {},
+            "order": self._order,
+            "lazy": self._lazy,
+            "dirty": self._dirty,
+            "changes": self._changes,
+            "changeCount": len(self._changes),
+            "created": [],
+        }
+        self._sessions.append(session)
+        return session
+
+    def commitSession(self, session):
+        """Closes a session. The outermost session writes the registry to disk."""
+        self._sessions.remove(session)
+        if not self._sessions:
+            self.flush()
+
+    def rollbackSession(self, session):
+        """Closes a session and restores the registry to its state when the session began."""
+        self._sessions.remove(session)
+        objects = session["objects"]
+        for key, bucket in session["buckets"].items():
+            if bucket is None:
+                objects.pop(key, None)
+            else:
+                objects[key] = bucket
+        owners = session["owners"]
+        if owners is not None:
+            for ref, entry in session["ownerRefs"].items():
+                if entry is None:
+                    owners.pop(ref, None)
+                else:
+                    owners[ref] = entry
+        self._objects = objects
+        self._owners = owners
+        self._order = session["order"]
+        self._lazy = session["lazy"]
+        self._dirty = session["dirty"]
+        changes = session["changes"]
+        del changes[session["changeCount"]:]
+        self._changes = changes
+
+# Process-wide registry shared by every rig module, kept alive across importlib.reload
+if "registry" not in globals():
+    registry = GeneratedObjectsRegistry(createBackend(REGISTRY_BACKEND, PERSISTENT_FILE_PATH))
+    atexit.register(lambda: registry.flush())
+    sceneCallbackIds = []
+
+def writeRegistryToScene(*args):
+    """Before-save callback: stores the registry on the scene node when the scene backend is active."""
+    if hasattr(registry.backend, "writeToScene"):
+        registry.flush()
+        registry.backend.writeToScene(registry.objects())
+
+def reloadRegistryFromScene(*args):
+    """After-open/new callback: drops the previous scene's registry and reads the new one."""
+    if hasattr(registry.backend, "writeToScene"):
+        registry.reload()
+
+def installSceneCallbacks():
+    """Registers the scene save/open callbacks that keep the scene backend in sync. Safe to call again."""
+    removeSceneCallbacks()
+    sceneCallbackIds.append(om2.MSceneMessage.addCallback(om2.MSceneMessage.kBeforeSave, writeRegistryToScene))
+    sceneCallbackIds.append(om2.MSceneMessage.addCallback(om2.MSceneMessage.kAfterOpen, reloadRegistryFromScene))
+    sceneCallbackIds.append(om2.MSceneMessage.addCallback(om2.MSceneMessage.kAfterNew, reloadRegistryFromScene))
+
+def removeSceneCallbacks():
+    while sceneCallbackIds:
+        om2.MMessage.removeCallback(sceneCallbackIds.pop())
+
 def loadGeneratedObjects():
-    """Loads the generated objects from the JSON file."""
-    if os.path.exists(PERSISTENT_FILE_PATH):
-        try:
-            with open(PERSISTENT_FILE_PATH, 'r') as file:
-                content = file.read().strip()
-                if not content:
-                    return {}  # Return empty dictionary if file is empty
-                return json.loads(content)
-        except json.JSONDecodeError:
-            print("Error: Failed to decode JSON. Resetting file.")
-            return {}  # Return empty dictionary if JSON is invalid
-    else:
-        return {}
+    """Loads the generated objects from the registry."""
+    return registry.asDict()
 
 def saveGeneratedObjects(objects):
     """Saves the updated dictionary of objects to the JSON file."""
-    with open(PERSISTENT_FILE_PATH, 'w') as file:
-        json.dump(objects, file, indent=4)
+    registry.replace(objects)
+    registry.flush()
+
+def setRegistryBackend(name, **kwargs):
+    """Switches the storage format of the registry file, e.g. setRegistryBackend("journal")."""
+    registry.setBackend(createBackend(name, PERSISTENT_FILE_PATH, **kwargs))
+    if name == "scene":
+        installSceneCallbacks()
+    else:
+        removeSceneCallbacks()
+
+if REGISTRY_BACKEND == "scene" and not sceneCallbackIds:
+    installSceneCallbacks()
+
+def flushGeneratedObjects():
+    """Writes any pending registry changes to the JSON file."""
+    registry.flush()
+
+@contextmanager
+def buildSession():
+    """
+    Groups every registry write of a module build into one transaction.
+
+    On success the registry is written to disk once (atomically). If the build
+    raises, the nodes it created are deleted in a single cmds.delete call, the
+    registry is rolled back and the exception is re-raised. Sessions can be
+    nested; only the outermost one commits or cleans up the scene. Can also be
+    used as a decorator: @buildSession()
+    """
+    session = registry.beginSession()
+    try:
+        yield session
+    except BaseException:
+        outermost = len(registry._sessions) == 1
+        registry.rollbackSession(session)
+        if outermost and session["created"]:
+            # Only delete what still exists, nodes may already be gone with their parent
+            existing = cmds.ls(session["created"], long=True) or []
+            if existing:
+                cmds.delete(minimalDeleteSet(existing))
+                print(f"Build failed, deleted {len(existing)} partially created objects")
+        raise
+    else:
+        registry.commitSession(session)
+
+def resolveObjectsByRole(key):
+    """Returns {role: full paths} of the objects of a key that still exist, one cmds.ls call per role.
+
+    Objects are looked up by UUID, so renamed nodes are still found. Entries stored
+    before UUIDs or roles were tracked fall back to their name and the None role.
+    """
+    refsByRole = {}
+    for obj, info in registry.items(key):
+        refsByRole.setdefault(info.get("role"), []).append(info.get("uuid") or obj)
+    return {role: cmds.ls(refs, long=True) or [] for role, refs in refsByRole.items()}
+
+def minimalDeleteSet(paths):
+    """
+    Reduces full node paths to the ones whose ancestors are not in the set.
+
+    Deleting a DAG node deletes everything below it, so only the topmost tracked
+    nodes need to be passed to cmds.delete. DG nodes have no "|" in their path
+    and are always kept.
+    """
+    pathSet = set(paths)
+    roots = []
+    for path in paths:
+        parts = path.split("|")
+        # parts[0] is the empty string before the leading "|"
+        if not any("|".join(parts[:i]) in pathSet for i in range(2, len(parts))):
+            roots.append(path)
+    return roots
 
 def cleanSpecificList(key):
-    """Deletes objects in a specified list and removes them from JSON."""
-    generated_objects = loadGeneratedObjects()
+    """Deletes objects in a specified list and removes them from the registry."""
+    # Templates imported into their own namespace go away with it in a single call
+    namespace = ":" + key
+    removedNamespace = cmds.namespace(exists=namespace)
+    if removedNamespace:
+        start = time.perf_counter()
+        cmds.namespace(removeNamespace=namespace, deleteNamespaceContent=True)
+        print(f"Cleaned {key}: removed namespace {namespace} in {(time.perf_counter() - start) * 1000.0:.1f} ms")
 
-    if key in generated_objects:
-        objects_to_delete = generated_objects[key]
+    if key in registry.keys():
+        start = time.perf_counter()
 
-        # Delete objects if they exist in the scene
-        existing_objects = [obj for obj in objects_to_delete if cmds.objExists(obj)]
+        # Resolve every tracked node in one query per role instead of one objExists per name
+        existingByRole = resolveObjectsByRole(key)
+        existing_objects = [path for paths in existingByRole.values() for path in paths]
         if existing_objects:
-            cmds.delete(existing_objects)
-            print(f"Deleted objects: {existing_objects}")
+            # Nodes below a module root go with it, DG utilities are deleted as they are and the remaining DAG nodes
+            # only when no tracked ancestor is deleted anyway
+            roots = existingByRole.get("root", [])
+            dgNodes = existingByRole.get("dg", [])
+            rootPrefixes = tuple(root + "|" for root in roots)
+            dagNodes = [path for role, paths in existingByRole.items() if role not in ("root", "dg")
+                        for path in paths if not path.startswith(rootPrefixes)]
+            deleteSet = minimalDeleteSet(roots + dagNodes)
+            toDelete = deleteSet + dgNodes
+            cmds.delete(toDelete)
+            rootSet = set(roots)
+            deletedRoots = sum(1 for path in deleteSet if path in rootSet)
+            print(f"Cleaned {key}: removed {len(existing_objects)} nodes with {len(toDelete)} deletes "
+                  f"({deletedRoots} module roots, {len(dgNodes)} DG utilities) in {(time.perf_counter() - start) * 1000.0:.1f} ms")
 
         # Reset the list instead of deleting the key
-        generated_objects[key] = []  # Reset the list to be empty
-
-        saveGeneratedObjects(generated_objects)  # Save changes
-    else:
+        registry.clear(key)
+    elif not removedNamespace:
         print(f"No objects found for key: {key}")
 
-def addObjectToList(key, new_object):
-    """Adds a new object to a specific list inside the JSON file, after cleaning old objects."""
-    generated_objects = loadGeneratedObjects()  # Load current data
+def getUUID(node):
+    """Returns the UUID of a node, or None if the name does not match exactly one node."""
+    uuids = cmds.ls(node, uuid=True) or []
+    return uuids[0] if len(uuids) == 1 else None
+
+def nodeRole(nodeType):
+    """Returns the teardown role for a node type: "dg" for utility nodes, "dag" otherwise."""
+    if not nodeType:
+        return None
+    return "dg" if nodeType in DG_NODE_TYPES else "dag"
+
+def addObjectToList(key, new_object, nodeType=None, role=None):
+    """
+    Adds a new object to a specific list inside the registry, ignoring duplicates.
+
+    role is "root" for a module's top group, "dag" for nodes inside the DAG and
+    "dg" for utility nodes; it is derived from nodeType when not given.
+    """
+    if registry.contains(key, new_object):
+        return
+    info = {"uuid": getUUID(new_object), "role": role or nodeRole(nodeType)}
+    if nodeType:
+        info["type"] = nodeType
+    registry.add(key, new_object, {name: value for name, value in info.items() if value} or None)
+
+def addObjectsToList(key, entries):
+    """
+    Adds several objects to a list in one pass. entries maps each object to its info
+    dict (uuid/role/type), so callers that already know the UUIDs skip the per-node lookup.
+    """
+    for obj, info in entries.items():
+        registry.add(key, obj, {name: value for name, value in info.items() if value} or None)
+
+def getObjectsOfType(key, nodeType):
+    """Returns the objects of a key registered with a node type, e.g. all parentConstraints."""
+    backend = registry.backend
+    if hasattr(backend, "objectsForKey") and not registry.isDirty():
+        return backend.objectsForKey(key, nodeType)
+    return registry.getOfType(key, nodeType)
 
-    # If the key does not exist, create an empty list for it
-    if key not in generated_objects:
-        generated_objects[key] = []
+def ownerOf(node):
+    """Returns the key of the rig module that created a node, or None if it is not tracked."""
+    owner = registry.owner(node)
+    if owner is None and "|" in node:
+        # Selections come back as DAG paths, the registry tracks short names
+        owner = registry.owner(node.rsplit("|", 1)[-1])
+    if owner is None:
+        # The node may have been renamed since it was registered
+        uuid = getUUID(node)
+        owner = registry.owner(uuid) if uuid else None
+    return owner[0] if owner else None
 
-    # Ensure no duplicates before adding
-    if new_object not in generated_objects[key]:
-        generated_objects[key].append(new_object)
-        saveGeneratedObjects(generated_objects)  # Save changes
\ No newline at end of file
+def ownersOf(nodes):
+    """Maps each node to the key that created it (None when untracked), e.g. for cmds.ls(selection=True)."""
+    return {node: ownerOf(node) for node in nodes}
@@ -0,0 +1,81 @@
+import math
+
+# Rotation matrices for whole chains at once. NumPy does the work when Maya's Python has it,
+# otherwise the same math runs per rotation in plain Python.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Maya's rotateOrder enum, index 0 is xyz
+ROTATE_ORDERS = ["xyz", "yzx", "zxy", "xzy", "yxz", "zyx"]
+
+def eulerToMatrices(rotations, rotateOrders=None, degrees=True):
+    """
+    Converts N euler rotations to N 4x4 rotation matrices in one call.
+
+    rotations is an (N, 3) sequence, rotateOrders a rotateOrder index or name per rotation
+    (xyz when omitted). The matrices use the same layout as functionality.euler_to_matrix,
+    which they match for the xyz order. Returns an (N, 4, 4) array, or nested lists without NumPy.
+    """
+    orders = [ROTATE_ORDERS[order] if isinstance(order, int) else order for order in rotateOrders] if rotateOrders is not None else None
+    if np is None:
+        return [_eulerToMatrix(rotation, orders[i] if orders else "xyz", degrees) for i, rotation in enumerate(rotations)]
+
+    angles = np.asarray(rotations, dtype=float).reshape(-1, 3)
+    if degrees:
+        angles = np.radians(angles)
+    count = len(angles)
+    cos, sin = np.cos(angles), np.sin(angles)
+
+    # One (N, 3, 3) stack per axis
+    axes = {}
+    for index, axis in enumerate("xyz"):
+        matrix = np.zeros((count, 3, 3))
+        c, s = cos[:, index], sin[:, index]
+        first, second = [i for i in range(3) if i != index]
+        matrix[:, index, index] = 1.0
+        matrix[:, first, first] = c
+        matrix[:, second, second] = c
+        # The y rotation has its sine signs flipped compared to x and z
+        sign = -1.0 if axis == "y" else 1.0
+        matrix[:, first, second] = -s * sign
+        matrix[:, second, first] = s * sign
+        axes[axis] = matrix
+
+    result = np.zeros((count, 4, 4))
+    result[:, 3, 3] = 1.0
+    orderNames = orders or ["xyz"] * count
+    for order in set(orderNames):
+        mask = np.array([name == order for name in orderNames])
+        a, b, c = (axes[axis][mask] for axis in order)
+        result[mask, :3, :3] = a @ b @ c
+    return result
+
+def _eulerToMatrix(rotation, order, degrees):
+    # Plain Python version of eulerToMatrices for a single rotation
+    angles = [math.radians(value) for value in rotation] if degrees else list(rotation)
+    matrices = {}
+    for index, axis in enumerate("xyz"):
+        c, s = math.cos(angles[index]), math.sin(angles[index])
+        matrix = [[0.0] * 3 for _ in range(3)]
+        first, second = [i for i in range(3) if i != index]
+        sign = -1.0 if axis == "y" else 1.0
+        matrix[index][index] = 1.0
+        matrix[first][first] = c
+        matrix[second][second] = c
+        matrix[first][second] = -s * sign
+        matrix[second][first] = s * sign
+        matrices[axis] = matrix
+
+    def multiply(left, right):
+        return [[sum(left[i][k] * right[k][j] for k in range(3)) for j in range(3)] for i in range(3)]
+
+    rotationMatrix = multiply(multiply(matrices[order[0]], matrices[order[1]]), matrices[order[2]])
+    return [row + [0.0] for row in rotationMatrix] + [[0.0, 0.0, 0.0, 1.0]]
+
+def addOffsets(values, offsets):
+    """Adds an (N, 3) sequence of offsets to an (N, 3) sequence of values. Returns nested lists."""
+    if np is None:
+        return [[value + offset for value, offset in zip(row, offsetRow)] for row, offsetRow in zip(values, offsets)]
+    return (np.asarray(values, dtype=float).reshape(-1, 3) + np.asarray(offsets, dtype=float).reshape(-1, 3)).tolist()
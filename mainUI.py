@@ -36,11 +36,25 @@ script_path = r"C:\\Users\\Asuch\\Desktop\\RiggingTool\\RiggingModules"
 if script_path not in sys.path:
     sys.path.append(script_path)
 
-# Reload py files uesd by rigging modules
-import functionality
-importlib.reload(functionality)
+# Reload py files uesd by rigging modules, dependencies before the modules that import them
+import registryBackends
+importlib.reload(registryBackends)
 import storeObjectsInJSON
 importlib.reload(storeObjectsInJSON)
+import transformMath
+importlib.reload(transformMath)
+import curveSampling
+importlib.reload(curveSampling)
+import controlShapeLibrary
+importlib.reload(controlShapeLibrary)
+import attributeBatch
+importlib.reload(attributeBatch)
+import dagBuilder
+importlib.reload(dagBuilder)
+import functionality
+importlib.reload(functionality)
+import cmdsProfiler
+importlib.reload(cmdsProfiler)
 import IKarms
 importlib.reload(IKarms)
 import splineSpineIK
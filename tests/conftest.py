@@ -0,0 +1,26 @@
+import os
+import sys
+import types
+from unittest import mock
+import pytest
+
+# The rigging modules import each other by name, the same way Maya's script path finds them
+RIGGING_MODULES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "RiggingModules")
+if RIGGING_MODULES not in sys.path:
+    sys.path.insert(0, RIGGING_MODULES)
+
+# Outside Maya the modules get stand-ins for maya.cmds and OpenMaya so they can be imported,
+# tests replace the commands they rely on with monkeypatch
+try:
+    import maya.cmds  # type: ignore
+except ImportError:
+    maya = types.ModuleType("maya")
+    maya.cmds = mock.MagicMock(name="maya.cmds")
+    maya.api = types.ModuleType("maya.api")
+    maya.api.OpenMaya = mock.MagicMock(name="maya.api.OpenMaya")
+    sys.modules.update({"maya": maya, "maya.cmds": maya.cmds, "maya.api": maya.api, "maya.api.OpenMaya": maya.api.OpenMaya})
+
+@pytest.fixture
+def registryPath(tmp_path):
+    """Path of a generatedObjects.json in an empty temp directory."""
+    return str(tmp_path / "generatedObjects.json")
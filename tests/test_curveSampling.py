@@ -0,0 +1,68 @@
+import math
+import pytest
+import curveSampling
+
+np = pytest.importorskip("numpy")
+
+def bezierData(cvs):
+    """curveData of a single span cubic curve with the given CVs."""
+    return {"degree": 3, "domain": (0.0, 1.0), "knots": [0.0] * 4 + [1.0] * 4, "cvs": cvs, "spans": 1}
+
+def bezier(cvs, t):
+    weights = [(1 - t) ** 3, 3 * t * (1 - t) ** 2, 3 * t ** 2 * (1 - t), t ** 3]
+    return [sum(weight * cv[axis] for weight, cv in zip(weights, cvs)) for axis in range(3)]
+
+CURVED = [[0.0, 0.0, 0.0], [0.0, 3.0, 1.0], [2.0, 7.0, -1.0], [0.0, 10.0, 0.0]]
+
+@pytest.fixture
+def curve(monkeypatch):
+    """Makes sampleCurve read the given data instead of asking Maya for it."""
+    def useCurve(data):
+        monkeypatch.setattr(curveSampling, "curveData", lambda curve, space=None: data)
+        return "curve1"
+    return useCurve
+
+def testEvaluateMatchesBezier():
+    parameters = np.linspace(0.0, 1.0, 11)
+    data = bezierData(CURVED)
+    points = curveSampling._evaluate(3, np.asarray(data["knots"]), np.asarray(CURVED), parameters)
+    for point, t in zip(points.tolist(), parameters):
+        assert point == pytest.approx(bezier(CURVED, t))
+
+def testEvaluateMultipleSpans():
+    # Degree 1 with interior knots is the polyline through the CVs
+    cvs = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [1.0, 2.0, 0.0]])
+    knots = np.array([0.0, 0.0, 1.0, 2.0, 2.0])
+    points = curveSampling._evaluate(1, knots, cvs, np.array([0.0, 0.5, 1.0, 1.5, 2.0]))
+    assert points.ravel().tolist() == pytest.approx([0, 0, 0, 0.5, 0, 0, 1, 0, 0, 1, 1, 0, 1, 2, 0])
+
+def testDerivativeMatchesFiniteDifference():
+    data = bezierData(CURVED)
+    knots, cvs = np.asarray(data["knots"]), np.asarray(CURVED)
+    degree, derivativeKnots, derivativeCvs = curveSampling._derivative(3, knots, cvs)
+    step = 1e-6
+    for t in (0.1, 0.5, 0.9):
+        tangent = curveSampling._evaluate(degree, derivativeKnots, derivativeCvs, np.array([t]))[0]
+        difference = (np.array(bezier(CURVED, t + step)) - np.array(bezier(CURVED, t - step))) / (2 * step)
+        assert tangent.tolist() == pytest.approx(difference.tolist(), rel=1e-5)
+
+def testSamplesAreEvenlySpacedByArcLength(curve):
+    # Uneven CV spacing makes the parameterisation non-uniform along a straight line
+    name = curve(bezierData([[0.0, 0.0, 0.0], [0.2, 0.0, 0.0], [0.4, 0.0, 0.0], [3.0, 0.0, 0.0]]))
+    positions, tangents = curveSampling.sampleCurve(name, 7)
+    assert [position[0] for position in positions] == pytest.approx([0.5 * i for i in range(7)], abs=1e-3)
+    assert np.ravel(tangents).tolist() == pytest.approx([1.0, 0.0, 0.0] * 7)
+
+def testSamplesOnCurvedSpine(curve):
+    name = curve(bezierData(CURVED))
+    positions, tangents = curveSampling.sampleCurve(name, 12)
+    assert positions[0] == pytest.approx(CURVED[0])
+    assert positions[-1] == pytest.approx(CURVED[-1])
+    # Chords of equal arcs only differ by the changing curvature
+    steps = [math.dist(a, b) for a, b in zip(positions, positions[1:])]
+    assert max(steps) - min(steps) < 1e-2 * max(steps)
+    assert [math.hypot(*tangent) for tangent in tangents] == pytest.approx([1.0] * 12)
+
+def testNeedsTwoSamples(curve):
+    with pytest.raises(ValueError):
+        curveSampling.sampleCurve(curve(bezierData(CURVED)), 1)
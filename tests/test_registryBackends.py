@@ -0,0 +1,172 @@
+import os
+import json
+import importlib
+import pytest
+import registryBackends
+import storeObjectsInJSON
+from registryBackends import createBackend, encodeBinarySnapshot, BinarySnapshot, ShardedBackend
+from storeObjectsInJSON import GeneratedObjectsRegistry
+
+BACKENDS = ["json", "journal", "sqlite", "sharded", "binary"]
+
+OBJECTS = {
+    "FKCHN3_L": {"FK_GRP_FKCHN3_L": {"uuid": "U-1", "type": "transform", "role": "root"},
+                 "joint1_FK_JNT_FKCHN3_L": {"uuid": "U-2", "type": "joint", "role": "dag"},
+                 "reverse_FKCHN3_L": {"uuid": "U-3", "type": "reverse", "role": "dg"}},
+    "TBIK_R": {"legacyName": None},
+}
+
+def fillRegistry(registry, objects=OBJECTS):
+    for key, objs in objects.items():
+        for obj, info in objs.items():
+            registry.add(key, obj, info)
+
+def closeBackend(backend):
+    if hasattr(backend, "close"):
+        backend.close()
+
+@pytest.mark.parametrize("name", BACKENDS)
+def testRoundTrip(registryPath, name):
+    registry = GeneratedObjectsRegistry(createBackend(name, registryPath))
+    fillRegistry(registry)
+    registry.flush()
+    closeBackend(registry.backend)
+
+    loaded = GeneratedObjectsRegistry(createBackend(name, registryPath))
+    assert loaded.objects() == OBJECTS
+    assert loaded.get("FKCHN3_L") == list(OBJECTS["FKCHN3_L"])
+    assert loaded.owner("U-2") == ("FKCHN3_L", 1)
+    closeBackend(loaded.backend)
+
+@pytest.mark.parametrize("name", BACKENDS)
+def testClearIsKeptAfterReload(registryPath, name):
+    registry = GeneratedObjectsRegistry(createBackend(name, registryPath))
+    fillRegistry(registry)
+    registry.flush()
+    registry.clear("FKCHN3_L")
+    registry.add("TBIK_R", "ikHandle_TBIK_R", {"type": "ikHandle"})
+    registry.flush()
+    closeBackend(registry.backend)
+
+    loaded = GeneratedObjectsRegistry(createBackend(name, registryPath))
+    assert loaded.keys() == ["FKCHN3_L", "TBIK_R"]
+    assert loaded.get("FKCHN3_L") == []
+    assert loaded.get("TBIK_R") == ["legacyName", "ikHandle_TBIK_R"]
+    closeBackend(loaded.backend)
+
+def testJournalReplaysOverSnapshot(registryPath):
+    backend = createBackend("journal", registryPath)
+    registry = GeneratedObjectsRegistry(backend)
+    fillRegistry(registry)
+    registry.flush()
+    assert os.path.exists(backend.journalPath)
+
+    backend.compact(registry.objects())
+    assert not os.path.exists(backend.journalPath)
+    with open(registryPath) as file:
+        assert list(json.load(file)) == list(OBJECTS)
+
+def testUnknownBackend(registryPath):
+    with pytest.raises(ValueError):
+        createBackend("xml", registryPath)
+
+def testBinarySnapshotLayout(tmp_path):
+    objects = {"KEY_ü": {"a": {"uuid": "U-1", "type": "joint", "role": "dag"}, "b": None, "joint": {"type": "joint"}},
+               "EMPTY": {}}
+    path = tmp_path / "snapshot.rgob"
+    path.write_bytes(encodeBinarySnapshot(objects))
+
+    snapshot = BinarySnapshot(str(path))
+    try:
+        assert snapshot.keys() == ["KEY_ü", "EMPTY"]
+        assert snapshot.decode("EMPTY") == {}
+        assert snapshot.decode("KEY_ü") == objects["KEY_ü"]
+    finally:
+        snapshot.close()
+
+def testBinarySnapshotStoresStringsOnce():
+    data = encodeBinarySnapshot({"K": {"a": {"type": "joint"}, "b": {"type": "joint"}, "joint": None}})
+    stringCount = BinarySnapshot.HEADER.unpack_from(data, 0)[3]
+    # "K", "a", "joint", "b"
+    assert stringCount == 4
+
+def testBinarySnapshotRejectsOtherFiles(tmp_path):
+    path = tmp_path / "snapshot.rgob"
+    path.write_bytes(b"XXXX" + bytes(BinarySnapshot.HEADER.size))
+    with pytest.raises(ValueError):
+        BinarySnapshot(str(path))
+
+def testBinaryBackendIsLazy(registryPath):
+    registry = GeneratedObjectsRegistry(createBackend("binary", registryPath))
+    fillRegistry(registry)
+    registry.flush()
+    registry.reload()
+    assert all(objects is registryBackends.NOT_DECODED for objects in registry._objects.values())
+
+    # Untouched keys are copied from the old snapshot when another key is written
+    registry.add("TBIK_R", "ikHandle_TBIK_R")
+    registry.flush()
+    assert registry._objects["FKCHN3_L"] is registryBackends.NOT_DECODED
+    registry.reload()
+    assert registry.get("FKCHN3_L") == list(OBJECTS["FKCHN3_L"])
+    assert registry.get("TBIK_R") == ["legacyName", "ikHandle_TBIK_R"]
+    registry.backend._snapshot.close()
+
+def testNotDecodedSurvivesReload(registryPath):
+    registry = GeneratedObjectsRegistry(createBackend("binary", registryPath))
+    fillRegistry(registry)
+    registry.flush()
+    registry.reload()
+    placeholder = registryBackends.NOT_DECODED
+
+    # The dev reload lists reload both modules while the registry instance lives on
+    importlib.reload(registryBackends)
+    importlib.reload(storeObjectsInJSON)
+    assert registryBackends.NOT_DECODED is placeholder
+    assert registry.get("FKCHN3_L") == list(OBJECTS["FKCHN3_L"])
+    registry.backend._snapshot.close()
+
+def shardFiles(path):
+    directory = os.path.splitext(path)[0] + "_shards"
+    return sorted(os.listdir(directory))
+
+def readIndex(path):
+    with open(os.path.join(os.path.splitext(path)[0] + "_shards", ShardedBackend.INDEX_FILE)) as file:
+        return json.load(file)
+
+def testShardedReplaceKeepsOtherProcessesShards(registryPath):
+    first = GeneratedObjectsRegistry(createBackend("sharded", registryPath))
+    first.add("FKCHN3_L", "FK_GRP_FKCHN3_L")
+    first.flush()
+
+    # A second Maya switches to the sharded backend with its own, unrelated keys
+    second = GeneratedObjectsRegistry(createBackend("json", registryPath))
+    second.add("TBIK_R", "IK_GRP_TBIK_R")
+    second.setBackend(createBackend("sharded", registryPath))
+    second.flush(force=True)
+
+    backend = ShardedBackend(registryPath)
+    assert shardFiles(registryPath) == sorted([backend.shardName("FKCHN3_L"), backend.shardName("TBIK_R"), ShardedBackend.INDEX_FILE])
+    assert set(readIndex(registryPath)) == {"FKCHN3_L", "TBIK_R"}
+    assert GeneratedObjectsRegistry(backend).asDict() == {"FKCHN3_L": ["FK_GRP_FKCHN3_L"], "TBIK_R": ["IK_GRP_TBIK_R"]}
+
+def testShardedReplaceRemovesOwnDroppedKeys(registryPath):
+    registry = GeneratedObjectsRegistry(createBackend("sharded", registryPath))
+    registry.add("FKCHN3_L", "FK_GRP_FKCHN3_L")
+    registry.add("TBIK_R", "IK_GRP_TBIK_R")
+    registry.flush()
+
+    registry.replace({"TBIK_R": ["IK_GRP_TBIK_R"]})
+    registry.flush()
+    assert shardFiles(registryPath) == sorted([ShardedBackend.shardName("TBIK_R"), ShardedBackend.INDEX_FILE])
+    assert list(readIndex(registryPath)) == ["TBIK_R"]
+
+def testShardedClearEmptiesForeignKey(registryPath):
+    first = GeneratedObjectsRegistry(createBackend("sharded", registryPath))
+    first.add("FKCHN3_L", "FK_GRP_FKCHN3_L")
+    first.flush()
+
+    second = GeneratedObjectsRegistry(createBackend("sharded", registryPath))
+    second.clear("FKCHN3_L")
+    second.flush()
+    assert GeneratedObjectsRegistry(createBackend("sharded", registryPath)).asDict() == {"FKCHN3_L": []}
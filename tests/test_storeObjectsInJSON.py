@@ -0,0 +1,125 @@
+import copy
+import pytest
+import storeObjectsInJSON
+from registryBackends import createBackend
+
+@pytest.fixture
+def registry(registryPath, monkeypatch):
+    """A JSON backed registry in a temp directory, installed as the module's process-wide registry."""
+    registry = storeObjectsInJSON.GeneratedObjectsRegistry(createBackend("json", registryPath))
+    registry.add("FKCHN3_L", "FK_GRP_FKCHN3_L", {"uuid": "U-1", "type": "transform", "role": "root"})
+    registry.add("TBIK_R", "IK_GRP_TBIK_R", {"uuid": "U-2", "type": "transform", "role": "root"})
+    registry.flush()
+    monkeypatch.setattr(storeObjectsInJSON, "registry", registry)
+    return registry
+
+def registryState(registry):
+    return copy.deepcopy(registry.objects()), dict(registry._owners), registry._order
+
+def testAddSkipsDuplicates(registry):
+    assert not registry.add("FKCHN3_L", "FK_GRP_FKCHN3_L")
+    registry.addMany("FKCHN3_L", ["a", "b", "a", "FK_GRP_FKCHN3_L"], {"type": "joint"})
+    assert registry.get("FKCHN3_L") == ["FK_GRP_FKCHN3_L", "a", "b"]
+    assert registry.getOfType("FKCHN3_L", "joint") == ["a", "b"]
+
+def testOwnerIndex(registry):
+    assert registry.owner("U-2") == ("TBIK_R", 1)
+    assert registry.owner("IK_GRP_TBIK_R") == ("TBIK_R", 1)
+    registry.clear("TBIK_R")
+    assert registry.owner("U-2") is None
+    assert registry.keys() == ["FKCHN3_L", "TBIK_R"]
+
+def testFlushIsDeferredInsideSession(registry, registryPath):
+    session = registry.beginSession()
+    registry.add("FKCHN3_L", "joint1")
+    registry.flush()
+    assert storeObjectsInJSON.GeneratedObjectsRegistry(createBackend("json", registryPath)).get("FKCHN3_L") == ["FK_GRP_FKCHN3_L"]
+    registry.commitSession(session)
+    assert storeObjectsInJSON.GeneratedObjectsRegistry(createBackend("json", registryPath)).get("FKCHN3_L") == ["FK_GRP_FKCHN3_L", "joint1"]
+
+def testRollbackRestoresRegistry(registry):
+    before = registryState(registry)
+    session = registry.beginSession()
+    registry.add("FKCHN3_L", "joint1", {"uuid": "U-3"})
+    registry.addMany("SSIK3_M", ["spine1", "spine2"])
+    registry.clear("TBIK_R")
+    registry.rollbackSession(session)
+
+    assert registryState(registry) == before
+    assert registry.keys() == ["FKCHN3_L", "TBIK_R"]
+    assert not registry.isDirty()
+    assert registry._changes == []
+
+def testRollbackOfNestedSession(registry):
+    outer = registry.beginSession()
+    registry.add("FKCHN3_L", "joint1")
+    inner = registry.beginSession()
+    registry.add("FKCHN3_L", "joint2")
+    registry.clear("TBIK_R")
+    registry.rollbackSession(inner)
+
+    assert registry.get("FKCHN3_L") == ["FK_GRP_FKCHN3_L", "joint1"]
+    assert registry.get("TBIK_R") == ["IK_GRP_TBIK_R"]
+    registry.rollbackSession(outer)
+    assert registry.get("FKCHN3_L") == ["FK_GRP_FKCHN3_L"]
+
+def testRollbackAfterReplace(registry):
+    before = registryState(registry)
+    session = registry.beginSession()
+    registry.add("FKCHN3_L", "joint1")
+    registry.replace({"OTHER": ["node"]})
+    registry.add("OTHER", "node2")
+    registry.rollbackSession(session)
+    assert registryState(registry) == before
+
+def testSessionCopiesOnlyChangedKeys(registry):
+    session = registry.beginSession()
+    assert session["buckets"] == {} and session["ownerRefs"] == {}
+    registry.add("FKCHN3_L", "joint1")
+    registry.add("FKCHN3_L", "joint2")
+    registry.add("SSIK3_M", "spine1")
+    assert session["buckets"] == {"FKCHN3_L": {"FK_GRP_FKCHN3_L": {"uuid": "U-1", "type": "transform", "role": "root"}},
+                                  "SSIK3_M": None}
+    assert set(session["ownerRefs"]) == {"joint1", "joint2", "spine1"}
+    registry.commitSession(session)
+
+def testBuildSessionDeletesCreatedNodesOnFailure(registry, monkeypatch):
+    deleted = []
+    monkeypatch.setattr(storeObjectsInJSON.cmds, "ls", lambda refs, long=True: ["|" + ref for ref in refs], raising=False)
+    monkeypatch.setattr(storeObjectsInJSON.cmds, "delete", deleted.extend, raising=False)
+
+    with pytest.raises(RuntimeError):
+        with storeObjectsInJSON.buildSession():
+            registry.add("FKCHN3_L", "FK_CTRL_GRP", {"uuid": "U-3"})
+            registry.add("FKCHN3_L", "joint1")
+            raise RuntimeError("build failed")
+
+    assert sorted(deleted) == ["|U-3", "|joint1"]
+    assert registry.get("FKCHN3_L") == ["FK_GRP_FKCHN3_L"]
+
+def testMinimalDeleteSet():
+    paths = ["|RIG|FK_GRP", "|RIG|FK_GRP|joint1", "|RIG|FK_GRP|joint1|joint2", "|OTHER", "reverse1"]
+    assert storeObjectsInJSON.minimalDeleteSet(paths) == ["|RIG|FK_GRP", "|OTHER", "reverse1"]
+
+def testCleanSpecificListUsesRoles(registry, monkeypatch):
+    paths = {"U-1": "|FK_GRP", "U-3": "|FK_GRP|joint1", "U-4": "|FK_GRP|joint1|joint2", "U-5": "reverse1",
+             "U-6": "|LOOSE", "U-7": "|LOOSE|child"}
+    roles = {"U-3": "dag", "U-4": "dag", "U-5": "dg", "U-6": "dag", "U-7": "dag", "U-8": "dag"}
+    for uuid, role in roles.items():
+        registry.add("FKCHN3_L", "node" + uuid, {"uuid": uuid, "role": role})
+    lsCalls, deleted = [], []
+
+    def ls(refs, long=True):
+        lsCalls.append(refs)
+        return [paths[ref] for ref in refs if ref in paths]
+
+    monkeypatch.setattr(storeObjectsInJSON.cmds, "ls", ls, raising=False)
+    monkeypatch.setattr(storeObjectsInJSON.cmds, "delete", deleted.extend, raising=False)
+    monkeypatch.setattr(storeObjectsInJSON.cmds, "namespace", lambda **kwargs: False, raising=False)
+    storeObjectsInJSON.cleanSpecificList("FKCHN3_L")
+
+    # One query per role, the deleted node U-8 is skipped
+    assert len(lsCalls) == 3
+    assert set(deleted) == {"|FK_GRP", "|LOOSE", "reverse1"} and len(deleted) == 3
+    assert registry.get("FKCHN3_L") == []
+    assert registry.get("TBIK_R") == ["IK_GRP_TBIK_R"]
@@ -0,0 +1,48 @@
+import pytest
+import transformMath
+from functionality import euler_to_matrix
+
+ROTATIONS = [[0, 0, 0], [10, 20, 30], [-45, 90, 12.5], [180, -30, 270], [0.001, 359, -720]]
+
+def toLists(matrices):
+    return matrices.tolist() if hasattr(matrices, "tolist") else matrices
+
+def assertMatricesEqual(matrices, expected):
+    for matrix, expectedMatrix in zip(toLists(matrices), expected):
+        for row, expectedRow in zip(matrix, expectedMatrix):
+            assert row == pytest.approx(expectedRow, abs=1e-9)
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    """Runs a test with NumPy and with the plain Python fallback."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(transformMath, "np", None)
+    return request.param
+
+def testMatchesEulerToMatrix(backend):
+    matrices = transformMath.eulerToMatrices(ROTATIONS)
+    assertMatricesEqual(matrices, [euler_to_matrix(rotation) for rotation in ROTATIONS])
+
+def testRotateOrdersComposeSingleAxisMatrices(backend):
+    # A rotate order multiplies the single axis matrices in its own order
+    rotation = [25, -40, 75]
+    single = {axis: transformMath._eulerToMatrix([rotation[i] if j == i else 0 for j in range(3)], "xyz", True)
+              for i, axis in enumerate("xyz")}
+
+    def multiply(left, right):
+        return [[sum(left[i][k] * right[k][j] for k in range(4)) for j in range(4)] for i in range(4)]
+
+    orders = list(range(len(transformMath.ROTATE_ORDERS)))
+    matrices = transformMath.eulerToMatrices([rotation] * len(orders), orders)
+    expected = [multiply(multiply(single[order[0]], single[order[1]]), single[order[2]]) for order in transformMath.ROTATE_ORDERS]
+    assertMatricesEqual(matrices, expected)
+
+def testRadians(backend):
+    matrices = transformMath.eulerToMatrices([[0.5, 1.0, -2.0]], ["zxy"], degrees=False)
+    expected = transformMath.eulerToMatrices([[28.64788975654116, 57.29577951308232, -114.59155902616465]], ["zxy"])
+    assertMatricesEqual(matrices, toLists(expected))
+
+def testAddOffsets(backend):
+    assert transformMath.addOffsets([[1, 2, 3], [4, 5, 6]], [[0.5, 0, -1], [0, 0, 0]]) == [[1.5, 2, 2], [4, 5, 6]]